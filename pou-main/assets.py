@@ -0,0 +1,133 @@
+import json
+import os
+import pygame
+import threading
+from collections import OrderedDict
+from constants import SCALED_CACHE_SIZE, SOUND_EXTENSIONS, ATLAS_INDEX
+
+
+# loads every image once in the display pixel format and keeps scaled and flipped copies in a bounded lru cache,
+# assets are loaded on first use or decoded ahead of time on a background thread, sprites packed into an atlas
+# are cut from the atlas image
+class AssetManager:
+    def __init__(self, cache_size=SCALED_CACHE_SIZE, atlas_index=ATLAS_INDEX):
+        self.images = {}
+        self.sounds = {}
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+
+        # files decoded by the preload thread, waiting to be picked up on the main thread
+        self.decoded = {}
+        self.decoding = set()
+        self.lock = threading.Lock()
+
+        # atlas image and area of every sprite in an atlas
+        self.atlas_regions = {}
+        if atlas_index is not None and os.path.exists(atlas_index):
+            self.add_atlas(atlas_index)
+
+    # the index is written by atlas.py
+    def add_atlas(self, index_path):
+        with open(index_path) as file:
+            index = json.load(file)
+        for name, rect in index["sprites"].items():
+            self.atlas_regions[name] = (index["image"], pygame.Rect(rect))
+
+    def is_loaded(self, name):
+        return name in self.images or name in self.sounds
+
+    # load an image and convert it, needs the display to exist
+    def load(self, name):
+        image = self.images.get(name)
+        if image is None and name in self.atlas_regions:
+            # sprites share the pixels of the atlas
+            atlas, rect = self.atlas_regions[name]
+            image = self.images[name] = self.load(atlas).subsurface(rect)
+        elif image is None:
+            with self.lock:
+                image = self.decoded.pop(name, None)
+            if image is None:
+                image = pygame.image.load(name)
+            if image.get_flags() & pygame.SRCALPHA:
+                image = image.convert_alpha()
+            else:
+                image = image.convert()
+            self.images[name] = image
+        return image
+
+    def sound(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
+            with self.lock:
+                sound = self.decoded.pop(name, None)
+            if sound is None:
+                sound = pygame.mixer.Sound(name)
+            self.sounds[name] = sound
+        return sound
+
+    # get an image by name, scaled to size and flipped if requested
+    def get(self, name, size=None, flip_x=False, flip_y=False):
+        if size is None and not flip_x and not flip_y:
+            return self.load(name)
+
+        key = (name, size, flip_x, flip_y)
+        surface = self.cache.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = self.load(name)
+        if size is not None and size != surface.get_size():
+            surface = pygame.transform.scale(surface, size)
+        if flip_x or flip_y:
+            surface = pygame.transform.flip(surface, flip_x, flip_y)
+        self.cache[key] = surface
+
+        # drop the least recently used surface when the cache is full
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return surface
+
+    # decode images and sounds on a background thread, converting still happens on first use
+    def preload(self, names):
+        names = dict.fromkeys(self.atlas_regions[name][0] if name in self.atlas_regions else name for name in names)
+        with self.lock:
+            names = [name for name in names
+                     if not self.is_loaded(name) and name not in self.decoded and name not in self.decoding]
+            self.decoding.update(names)
+        if names:
+            threading.Thread(target=self.decode, args=(names,), daemon=True).start()
+
+    def decode(self, names):
+        for name in names:
+            # failures are left for the main thread to raise on first use
+            try:
+                if name.endswith(SOUND_EXTENSIONS):
+                    asset = pygame.mixer.Sound(name)
+                else:
+                    asset = pygame.image.load(name)
+            except (pygame.error, FileNotFoundError):
+                asset = None
+            with self.lock:
+                self.decoding.discard(name)
+                if asset is not None and not self.is_loaded(name):
+                    self.decoded[name] = asset
+
+    # load everything right away on the main thread
+    def load_all(self, names):
+        for name in names:
+            if name.endswith(SOUND_EXTENSIONS):
+                self.sound(name)
+            else:
+                self.load(name)
+
+    def stats(self):
+        return {"images": len(self.images), "sounds": len(self.sounds), "cached": len(self.cache),
+                "hits": self.hits, "misses": self.misses}
+
+
+assets = AssetManager()
@@ -0,0 +1,95 @@
+from headless import init_headless
+
+import argparse
+import json
+import os
+import time
+import pygame
+from assets import AssetManager
+from constants import ATLAS_IMAGE, ATLAS_INDEX
+from food_images import food_images_list
+from skins_images import skin_images_list
+from trash_images import trash_images_list
+
+# sprites packed into the atlas, they keep their file names as names in the index
+atlas_sprites = [*food_images_list, *trash_images_list, *skin_images_list]
+ATLAS_WIDTH = 1024
+ATLAS_PADDING = 1
+
+# the skins are drawn at 100 pixels at most, larger sprites are scaled down to this size when packed
+ATLAS_MAX_SPRITE_SIZE = 200
+
+
+# shelf packing, the tallest sprites go first and fill rows left to right, returns the positions and the atlas size
+def pack(sizes, width=ATLAS_WIDTH, padding=ATLAS_PADDING):
+    positions = {}
+    x = y = shelf_height = used_width = 0
+    for name, (sprite_width, sprite_height) in sorted(sizes.items(), key=lambda item: (-item[1][1], item[0])):
+        if x + sprite_width > width:
+            x, y = 0, y + shelf_height + padding
+            shelf_height = 0
+        positions[name] = (x, y)
+        x += sprite_width + padding
+        shelf_height = max(shelf_height, sprite_height)
+        used_width = max(used_width, x - padding)
+    return positions, (used_width, y + shelf_height)
+
+
+def build_atlas(names=atlas_sprites, image_path=ATLAS_IMAGE, index_path=ATLAS_INDEX):
+    images = {}
+    for name in names:
+        image = pygame.image.load(name).convert_alpha()
+        scale = ATLAS_MAX_SPRITE_SIZE / max(image.get_size())
+        if scale < 1:
+            image = pygame.transform.smoothscale(
+                image, (round(image.get_width() * scale), round(image.get_height() * scale)))
+        images[name] = image
+    positions, size = pack({name: image.get_size() for name, image in images.items()})
+
+    # adding to a transparent surface copies the pixels exactly, a normal blit would blend the edges
+    atlas = pygame.Surface(size, pygame.SRCALPHA, 32)
+    sprites = {}
+    for name, image in images.items():
+        atlas.blit(image, positions[name], special_flags=pygame.BLEND_RGBA_ADD)
+        sprites[name] = [*positions[name], *image.get_size()]
+
+    os.makedirs(os.path.dirname(image_path) or ".", exist_ok=True)
+    pygame.image.save(atlas, image_path)
+    with open(index_path, "w") as file:
+        json.dump({"image": image_path, "sprites": sprites}, file, indent=1)
+    return size
+
+
+# time loading every atlas sprite through a fresh asset manager, with and without the atlas
+def benchmark(repeat):
+    results = {}
+    for mode in ("files", "atlas"):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            manager = AssetManager()
+            if mode == "files":
+                manager.atlas_regions.clear()
+            for name in atlas_sprites:
+                manager.load(name)
+        results[mode] = (time.perf_counter() - start) / repeat * 1000
+        decoded = sum(name not in manager.atlas_regions for name in manager.images)
+        print(f"{mode:<6} {results[mode]:8.1f} ms for {len(atlas_sprites)} sprites ({decoded} files decoded)")
+    print(f"atlas loading is {results['files'] / results['atlas']:.1f}x faster")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the food, trash and skin sprites into a texture atlas")
+    parser.add_argument("--benchmark", action="store_true", help="compare loading the sprites with and without it")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    init_headless()
+    if args.benchmark:
+        benchmark(args.repeat)
+    else:
+        width, height = build_atlas()
+        print(f"Packed {len(atlas_sprites)} sprites into {ATLAS_IMAGE} ({width}x{height})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import pygame
+from assets import assets
+from constants import SFX_CHANNELS, MUSIC_FADE_MS
+
+
+# music is streamed from disk through pygame.mixer.music, sound effects play on a pool of mixer channels
+class Audio:
+    def __init__(self, sfx_channels=SFX_CHANNELS, fade_ms=MUSIC_FADE_MS):
+        pygame.mixer.set_num_channels(sfx_channels)
+        self.fade_ms = fade_ms
+        self.enabled = True
+
+        # the track that should be playing and the track loaded in the music stream
+        self.track = None
+        self.playing = None
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        pygame.mixer.music.stop()
+        pygame.mixer.stop()
+        self.playing = None
+
+    # switch tracks by fading the current one out and the new one in, None fades to silence
+    def play_music(self, track):
+        if track == self.track:
+            return
+        self.track = track
+        if self.playing is not None:
+            pygame.mixer.music.fadeout(self.fade_ms)
+            self.playing = None
+        self.update()
+
+    def stop_music(self):
+        self.play_music(None)
+
+    def pause_music(self):
+        pygame.mixer.music.pause()
+
+    def resume_music(self):
+        pygame.mixer.music.unpause()
+
+    # start the next track once the previous one has faded out
+    def update(self):
+        if self.track != self.playing and not pygame.mixer.music.get_busy():
+            self.playing = self.track
+            if self.track is not None and self.enabled:
+                pygame.mixer.music.load(self.track)
+                pygame.mixer.music.play(loops=-1, fade_ms=self.fade_ms)
+
+    # play a sound effect on a free channel, or on the oldest one when all are busy
+    def play_sfx(self, sound):
+        if self.enabled:
+            pygame.mixer.find_channel(True).play(assets.sound(sound))
+
+
+audio = Audio()
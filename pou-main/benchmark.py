@@ -0,0 +1,234 @@
+from headless import init_headless
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import pygame
+from button import Button
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from inputs import RandomKeys, ScriptedInput
+from minigames import minigame_classes, start_run
+from renderer import Renderer
+from skins_images import DEFAULT_IMAGE
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# allocations per frame are the same on every machine and are committed, frame rates are only comparable on the
+# machine that measured them and are saved to a local baseline
+BASELINE_PATH = "benchmark_baseline.json"
+LOCAL_BASELINE_PATH = "benchmark_local.json"
+
+
+# keeps pou between the trees by tapping space whenever it is about to touch the lower tree of the next gap,
+# a jump rises less than the gap is tall
+class JetPouAutopilot:
+    def __init__(self, game):
+        self.game = game
+
+    def __call__(self, tick):
+        game = self.game
+        ahead = [pair.lower for pair in game.trees if pair.lower.right > game.x]
+        floor = min(ahead, key=lambda tree: tree.x).top if ahead else 550
+        if game.can_jump and game.gravity > 0 and game.hitbox.bottom > floor - 12:
+            return (pygame.K_SPACE,)
+        return ()
+
+
+# hops towards the step in the row above pou
+class SkyHopAutopilot:
+    def __init__(self, game):
+        self.game = game
+
+    def __call__(self, tick):
+        game = self.game
+        if game.move_pou:
+            return ()
+        row = game.first_row
+        while game.row_y(row) >= game.y:
+            row += 1
+        step = game.step_x(row) + game.step_width / 2
+        return (pygame.K_d,) if step > game.x + game.pou_width / 2 else (pygame.K_a,)
+
+
+def random_player(keys):
+    return lambda game, seed: RandomKeys(keys, seed)
+
+
+def high_score(game):
+    game.score = 200
+
+
+def precise_collision(game):
+    game.precise_collision = True
+
+
+# name: (minigame, input script factory, setup after every start)
+scenarios = {
+    "fooddrop": ("fooddrop", random_player([pygame.K_a, pygame.K_d, None]), None),
+    "fooddrop_high_score": ("fooddrop", random_player([pygame.K_a, pygame.K_d, None]), high_score),
+    "fooddrop_precise": ("fooddrop", random_player([pygame.K_a, pygame.K_d, None]), precise_collision),
+    "jetpou": ("jetpou", random_player([pygame.K_SPACE, None]), None),
+    "jetpou_long_run": ("jetpou", lambda game, seed: JetPouAutopilot(game), None),
+    "jetpou_precise": ("jetpou", lambda game, seed: JetPouAutopilot(game), precise_collision),
+    "skyhop": ("skyhop", random_player([pygame.K_a, pygame.K_d, None]), None),
+    "skyhop_long_run": ("skyhop", lambda game, seed: SkyHopAutopilot(game), None),
+    "menu": (None, None, None),
+}
+
+
+# one frame is one simulation tick followed by a render into the offscreen surface
+def scenario_frames(name, renderer, seed):
+    game_name, script_factory, setup = scenarios[name]
+
+    if game_name is None:
+        background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        buttons = [Button(150 + 100 * index, renderer, text) for index, text in
+                   enumerate(["Minigames", "Settings", "Exit"])]
+
+        def menu_frame(frame):
+            if frame % 30 == 0:
+                for index, button in enumerate(buttons):
+                    button.set_selected(index == frame // 30 % len(buttons))
+            renderer.set_background(background)
+            for button in buttons:
+                button.draw()
+            renderer.present()
+        return menu_frame, lambda: 0
+
+    game = minigame_classes[game_name](renderer, random.Random(), None)
+    game.input = ScriptedInput(script_factory(game, seed))
+    runs = [0]
+
+    def start():
+        start_run(game, seed + runs[0])
+        runs[0] += 1
+        if setup is not None:
+            setup(game)
+    start()
+
+    def game_frame(frame):
+        game.input.begin_tick()
+        game.update()
+        if game.is_game_over:
+            start()
+        game.render(DEFAULT_IMAGE, 0.5)
+        renderer.present()
+    return game_frame, lambda: runs[0]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# the frame rate is the best of the repeats, slower repeats only measure whatever else the machine was doing
+def run_scenario(name, frames, seed, repeats):
+    renderer = Renderer(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)), update_display=False)
+
+    # timing passes, every repeat plays the same runs
+    fps = runs = None
+    for _ in range(repeats):
+        frame, run_count = scenario_frames(name, renderer, seed)
+        start = time.perf_counter()
+        for index in range(frames):
+            frame(index)
+        repeat_fps = round(frames / (time.perf_counter() - start))
+        fps = repeat_fps if fps is None else max(fps, repeat_fps)
+        runs = run_count()
+
+    # allocation pass, the peak traced memory above the start of each frame is the memory it allocated
+    frame, run_count = scenario_frames(name, renderer, seed)
+    allocation_frames = min(frames, 1000)
+    tracemalloc.start()
+    allocated = 0
+    for index in range(allocation_frames):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        frame(index)
+        allocated += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+
+    return {"fps": fps, "alloc_bytes_per_frame": round(allocated / allocation_frames),
+            "runs": run_count() if runs is None else runs, "peak_rss_mb": peak_rss_mb()}
+
+
+# a scenario regressed when it got slower or allocates more than the tolerance allows, frame rates are only
+# compared when both the run and the baseline have them
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        if (result["fps"] is not None and "fps" in baseline[name]
+                and result["fps"] < baseline[name]["fps"] * (1 - tolerance)):
+            regressions.append(f"{name}: {result['fps']} fps, baseline {baseline[name]['fps']}")
+        if result["alloc_bytes_per_frame"] > baseline[name]["alloc_bytes_per_frame"] * (1 + tolerance) + 64:
+            regressions.append(f"{name}: {result['alloc_bytes_per_frame']} bytes/frame, "
+                               f"baseline {baseline[name]['alloc_bytes_per_frame']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the minigames and the menu headlessly")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario", help=f"any of {', '.join(scenarios)}")
+    parser.add_argument("--frames", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3, help="timing passes per scenario, the best one counts")
+    parser.add_argument("--allocations-only", action="store_true",
+                        help="skip the timing passes and only measure and save allocations")
+    parser.add_argument("--save-baseline", nargs="?", const=LOCAL_BASELINE_PATH, metavar="PATH",
+                        help=f"save the results, {LOCAL_BASELINE_PATH} by default")
+    parser.add_argument("--baseline", nargs="?", const=BASELINE_PATH, metavar="PATH",
+                        help=f"compare with a saved baseline, {BASELINE_PATH} by default, and exit with 1 on "
+                             f"regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    if args.allocations_only:
+        args.repeats = 0
+    for name in args.scenarios:
+        if name not in scenarios:
+            parser.error(f"unknown scenario {name}")
+
+    # read the baseline before spending minutes on the scenarios
+    baseline = None
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            sys.exit(f"No baseline at {args.baseline}, save one with --save-baseline first")
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    init_headless()
+    results = {}
+    print(f"{'scenario':<22}{'fps':>10}{'bytes/frame':>14}{'runs':>7}{'peak rss mb':>14}")
+    for name in args.scenarios or scenarios:
+        results[name] = result = run_scenario(name, args.frames, args.seed, args.repeats)
+        print(f"{name:<22}{result['fps'] or '-':>10}{result['alloc_bytes_per_frame']:>14}{result['runs']:>7}"
+              f"{str(result['peak_rss_mb']):>14}")
+
+    if args.save_baseline:
+        saved = {name: {key: value for key, value in result.items() if value is not None and
+                        (key == "alloc_bytes_per_frame" or not args.allocations_only)}
+                 for name, result in results.items()}
+        with open(args.save_baseline, "w") as file:
+            json.dump(saved, file, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
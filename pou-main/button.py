@@ -12,7 +12,18 @@ class Button:
         self.width = self.screen.get_rect()
         self.selected = False
 
+        # rendered text and its position, rebuilt only when the text or highlight changes
+        self.text_rendered = None
+        self.center_x = 0
+
     def draw(self):
+        if self.text_rendered is None:
+            self.render()
+
+        # draw the text at the centered position
+        self.screen.blit(self.text_rendered, (self.center_x, self.y))
+
+    def render(self):
         # set the text color
         if self.selected:
             color = self.HIGHLIGHTED_TEXT_COLOR
@@ -20,14 +31,18 @@ class Button:
             color = self.TEXT_COLOR
 
         # render the text
-        text_rendered = BIG_FONT.render(self.text, True, color)
+        self.text_rendered = BIG_FONT.render(self.text, True, color)
 
         # calculate the centered x position
-        text_width = text_rendered.get_width()
-        center_x = self.screen.get_width() / 2 - text_width / 2
-
-        # draw the text at the centered position
-        self.screen.blit(text_rendered, (center_x, self.y))
+        text_width = self.text_rendered.get_width()
+        self.center_x = self.screen.get_width() / 2 - text_width / 2
 
     def set_selected(self, selected):
-        self.selected = selected
+        if selected != self.selected:
+            self.selected = selected
+            self.text_rendered = None
+
+    def set_text(self, text):
+        if text != self.text:
+            self.text = text
+            self.text_rendered = None
@@ -0,0 +1,109 @@
+import argparse
+import random
+import time
+import pygame
+from constants import COLLISION_CELL_SIZE
+
+# item sized rects per screen sized area, the world grows with the count so the density stays the same
+BENCHMARK_DENSITY = 40
+BENCHMARK_COUNTS = (100, 1000, 5000)
+
+
+# uniform grid broad phase, rects are bucketed by the cells they overlap and a query only tests the rects
+# sharing a cell with the queried rect
+class SpatialGrid:
+    def __init__(self, cell_size=COLLISION_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    # keep the cell lists allocated between ticks
+    def clear(self):
+        for cell in self.cells.values():
+            cell.clear()
+
+    def cell_ranges(self, rect):
+        size = self.cell_size
+        return (range(rect.left // size, (rect.right - 1) // size + 1),
+                range(rect.top // size, (rect.bottom - 1) // size + 1))
+
+    def insert(self, rect, value):
+        columns, rows = self.cell_ranges(rect)
+        for column in columns:
+            for row in rows:
+                cell = self.cells.get((column, row))
+                if cell is None:
+                    cell = self.cells[(column, row)] = []
+                cell.append((rect, value))
+
+    def rebuild(self, entries):
+        self.clear()
+        for rect, value in entries:
+            self.insert(rect, value)
+
+    # values whose rects collide with rect, each value reported once
+    def query(self, rect):
+        candidates = []
+        columns, rows = self.cell_ranges(rect)
+        for column in columns:
+            for row in rows:
+                cell = self.cells.get((column, row))
+                if cell:
+                    candidates.extend(cell)
+        if not candidates:
+            return []
+
+        # narrow phase as one batch test
+        found = []
+        for index in rect.collidelistall([candidate[0] for candidate in candidates]):
+            value = candidates[index][1]
+            if value not in found:
+                found.append(value)
+        return found
+
+
+# every rect against every other one, as a game testing all its objects each tick would, rebuilding the grid
+# and querying it once per rect against one collidelistall of all rects per rect
+def benchmark(counts, repeat, seed=0):
+    rng = random.Random(seed)
+    previous = None
+    for count in counts:
+        scale = (count / BENCHMARK_DENSITY) ** 0.5
+        rects = [pygame.Rect(rng.uniform(0, 1200 * scale), rng.uniform(0, 600 * scale), 50, 50) for _ in range(count)]
+        grid = SpatialGrid()
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            grid.rebuild((rect, index) for index, rect in enumerate(rects))
+            grid_hits = sum(len(grid.query(rect)) for rect in rects)
+        grid_time = (time.perf_counter() - start) / repeat * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            brute_hits = sum(len(rect.collidelistall(rects)) for rect in rects)
+        brute_time = (time.perf_counter() - start) / repeat * 1000
+
+        assert grid_hits == brute_hits
+        line = f"{count:>6} rects   grid {grid_time:9.2f} ms   brute force {brute_time:9.2f} ms"
+        if previous is not None:
+            growth = count / previous[0]
+            line += (f"   x{growth:g} rects: grid x{grid_time / previous[1]:.1f}, "
+                     f"brute force x{brute_time / previous[2]:.1f}")
+        print(line)
+        previous = (count, grid_time, brute_time)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spatial grid broad phase")
+    parser.add_argument("--benchmark", action="store_true", help="compare the grid with brute force as rects grow")
+    parser.add_argument("--counts", type=int, nargs="+", default=BENCHMARK_COUNTS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.counts, args.repeat)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import pygame
+from collections import OrderedDict
+from assets import assets
+from constants import FRAME_CACHE_BYTES, FRAME_ANGLE_STEP, FRAME_SCALE_STEP
+
+# stands for the selected skin in a list of layers
+SKIN = None
+
+
+# width and height scale of pou squashed by amount, negative amounts stretch it, the width makes up for the height
+def squash_scale(amount):
+    return 1 + amount, 1 - amount
+
+
+# pou's skin with the accessories of a minigame baked into one surface, so pou is a single blit with no scaling,
+# layers are (image, size, offset) drawn in order with the offset from pou's top left corner, a composite is
+# built once per layer list and everything is thrown away when the skin changes
+class CompositeCache:
+    def __init__(self, frame_cache_bytes=FRAME_CACHE_BYTES, angle_step=FRAME_ANGLE_STEP, scale_step=FRAME_SCALE_STEP):
+        self.skin = None
+        self.composites = {}
+        self.builds = 0
+
+        # turned and scaled frames of the composites, angles and scales are rounded to steps so a few frames cover
+        # a whole animation, the least recently used frames are dropped once they take more than the cap
+        self.frames = OrderedDict()
+        self.frame_bytes = 0
+        self.frame_cache_bytes = frame_cache_bytes
+        self.angle_step = angle_step
+        self.scale_step = scale_step
+
+    def set_skin(self, skin):
+        if skin != self.skin:
+            self.skin = skin
+            self.composites.clear()
+            self.frames.clear()
+            self.frame_bytes = 0
+
+    # returns the composite and the offset to add to pou's position when drawing it
+    def get(self, skin, layers):
+        if skin != self.skin:
+            self.set_skin(skin)
+        composite = self.composites.get(layers)
+        if composite is None:
+            composite = self.composites[layers] = self.build(layers)
+        return composite
+
+    def build(self, layers):
+        self.builds += 1
+        images = [(assets.get(self.skin if name is SKIN else name, size), offset) for name, size, offset in layers]
+        bounds = pygame.Rect(images[0][1], images[0][0].get_size())
+        for image, offset in images[1:]:
+            bounds.union_ip(pygame.Rect(offset, image.get_size()))
+
+        # blitting onto fully transparent pixels copies the source, so edges keep their colors
+        surface = pygame.Surface(bounds.size, pygame.SRCALPHA).convert_alpha()
+        for image, offset in images:
+            surface.blit(image, (offset[0] - bounds.x, offset[1] - bounds.y))
+        return surface, bounds.topleft
+
+    # the composite turned by angle degrees counterclockwise around its center and scaled around its bottom center,
+    # so a squashed pou keeps standing on the same spot, returned like get
+    def frame(self, skin, layers, angle=0, scale=(1, 1)):
+        angle = round(angle / self.angle_step) * self.angle_step
+        scale = tuple(round(factor / self.scale_step) * self.scale_step for factor in scale)
+        composite = self.get(skin, layers)
+        if not angle and scale == (1, 1):
+            return composite
+
+        key = (layers, angle, scale)
+        frame = self.frames.get(key)
+        if frame is not None:
+            self.frames.move_to_end(key)
+            return frame
+
+        self.builds += 1
+        surface, (x, y) = composite
+        width, height = surface.get_size()
+        size = (max(round(width * scale[0]), 1), max(round(height * scale[1]), 1))
+        if size != (width, height):
+            x += (width - size[0]) / 2
+            y += height - size[1]
+            surface = pygame.transform.smoothscale(surface, size)
+        if angle:
+            center = (x + size[0] / 2, y + size[1] / 2)
+            surface = pygame.transform.rotozoom(surface, angle, 1)
+            x, y = center[0] - surface.get_width() / 2, center[1] - surface.get_height() / 2
+        frame = self.frames[key] = (surface, (round(x), round(y)))
+
+        self.frame_bytes += surface.get_pitch() * surface.get_height()
+        while self.frame_bytes > self.frame_cache_bytes and len(self.frames) > 1:
+            dropped = self.frames.popitem(last=False)[1][0]
+            self.frame_bytes -= dropped.get_pitch() * dropped.get_height()
+        return frame
+
+
+composites = CompositeCache()
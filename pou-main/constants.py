@@ -11,10 +11,39 @@ CHARACTER_HEIGHT = 100
 SMALL_FONT = pygame.font.Font("default_font.ttf", 30)
 MEDIUM_FONT = pygame.font.Font("default_font.ttf", 40)
 BIG_FONT = pygame.font.Font("default_font.ttf", 50)
-EAT_SOUND = pygame.mixer.Sound("audio/eat.wav")
-GAME_OVER_SOUND = pygame.mixer.Sound("audio/game_over.wav")
-FOOD_DROP_SOUND = pygame.mixer.Sound("audio/food_drop_song.mp3")
-JET_POU_SOUND = pygame.mixer.Sound("audio/jet_pou_sound.mp3")
-JETPACK_SOUND = pygame.mixer.Sound("audio/jetpack_sound.mp3")
-SKY_HOP_SOUND = pygame.mixer.Sound("audio/sky_hop_song.mp3")
-JUMP_SOUND = pygame.mixer.Sound("audio/jump.mp3")
+EAT_SOUND = "audio/eat.wav"
+GAME_OVER_SOUND = "audio/game_over.wav"
+FOOD_DROP_SOUND = "audio/food_drop_song.mp3"
+JET_POU_SOUND = "audio/jet_pou_sound.mp3"
+JETPACK_SOUND = "audio/jetpack_sound.mp3"
+SKY_HOP_SOUND = "audio/sky_hop_song.mp3"
+JUMP_SOUND = "audio/jump.mp3"
+UPDATE_RATE = 60
+MAX_FPS = 120
+MAX_FRAME_TIME = 0.25
+SCALED_CACHE_SIZE = 64
+LAZY_LOADING = True
+SOUND_EXTENSIONS = (".wav", ".mp3", ".ogg")
+SFX_CHANNELS = 8
+MUSIC_FADE_MS = 400
+TEXT_CACHE_SIZE = 128
+DIRTY_RECTS = False
+COLLISION_CELL_SIZE = 150
+REPLAY_DIRECTORY = "replays"
+PROFILER_HISTORY = 600
+PROFILER_OVERLAY_REFRESH = 0.5
+MENU_WAIT_TIMEOUT = 100
+KEY_BINDINGS = {pygame.K_LEFT: pygame.K_a, pygame.K_RIGHT: pygame.K_d, pygame.K_UP: pygame.K_SPACE}
+SAVE_DATABASE = "pou.db"
+LEADERBOARD_SIZE = 5
+WRITE_BATCH_SIZE = 64
+WRITE_FLUSH_INTERVAL = 1.0
+ATLAS_IMAGE = "atlas/sprites.png"
+ATLAS_INDEX = "atlas/sprites.json"
+PRECISE_COLLISION = False
+FRAME_CACHE_BYTES = 8 * 1024 * 1024
+FRAME_ANGLE_STEP = 5
+FRAME_SCALE_STEP = 0.05
+PARTICLE_BUDGET = 2048
+PARTICLE_FADE_STEPS = 8
+PERFORMANCE_SCALE = 0.5
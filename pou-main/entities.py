@@ -0,0 +1,107 @@
+import pygame
+
+
+# a falling food or trash item, the rect is its hitbox and the sprite rect covers the whole sprite for pixel tests,
+# both are reused whenever the item is recycled
+class FallingItem:
+    __slots__ = ("rect", "sprite_rect", "image", "active")
+
+    def __init__(self):
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.sprite_rect = pygame.Rect(0, 0, 0, 0)
+        self.image = None
+        self.active = False
+
+
+# fixed number of preallocated items, released items wait on a free list until they are spawned again
+class ItemPool:
+    def __init__(self, size):
+        self.size = size
+        self.free = [FallingItem() for _ in range(size)]
+        self.active = []
+
+    def __len__(self):
+        return len(self.active)
+
+    def __iter__(self):
+        return iter(self.active)
+
+    # returns None when every item is in use, the sprite rect is as big as the rect without a sprite size
+    def spawn(self, x, y, width, height, image, sprite_size=None):
+        if not self.free:
+            return None
+        item = self.free.pop()
+        item.rect.update(x, y, width, height)
+        item.sprite_rect.update((x, y), sprite_size or (width, height))
+        item.image = image
+        item.active = True
+        self.active.append(item)
+        return item
+
+    # released items stay in the active list until the next sweep, so it is safe to release while iterating
+    def release(self, item):
+        if item.active:
+            item.active = False
+            self.free.append(item)
+
+    # compact the active list in place
+    def sweep(self):
+        kept = 0
+        for item in self.active:
+            if item.active:
+                self.active[kept] = item
+                kept += 1
+        del self.active[kept:]
+
+    def clear(self):
+        for item in self.active:
+            self.release(item)
+        self.active.clear()
+
+
+# an upper and a lower tree with a gap between them, both rects are reused when the pair is recycled
+class TreePair:
+    __slots__ = ("upper", "lower")
+
+    def __init__(self, width, height):
+        self.upper = pygame.Rect(0, 0, width, height)
+        self.lower = pygame.Rect(0, 0, width, height)
+
+    # y is the top of the upper tree
+    def place(self, x, y, gap):
+        self.upper.topleft = (x, y)
+        self.lower.topleft = (x, self.upper.bottom + gap)
+
+    def move(self, dx):
+        self.upper.x += dx
+        self.lower.x += dx
+
+
+# fixed number of tree pairs in a ring buffer, the first pair is the leftmost one and moves behind the last pair
+# when it is recycled
+class TreeRing:
+    def __init__(self, count, width, height):
+        self.pairs = [TreePair(width, height) for _ in range(count)]
+        self.first = 0
+
+    def __len__(self):
+        return len(self.pairs)
+
+    # pairs in storage order, not left to right
+    def __iter__(self):
+        return iter(self.pairs)
+
+    def first_pair(self):
+        return self.pairs[self.first]
+
+    def last_pair(self):
+        return self.pairs[self.first - 1]
+
+    # the first pair becomes the last one, place it after returning it
+    def recycle(self):
+        pair = self.pairs[self.first]
+        self.first = (self.first + 1) % len(self.pairs)
+        return pair
+
+    def reset(self):
+        self.first = 0
@@ -0,0 +1,199 @@
+from headless import init_headless
+
+import argparse
+import multiprocessing
+import random
+import time
+import pygame
+from inputs import ScriptedInput
+from minigames import minigame_classes, start_run
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# keys held for every action of each minigame, action 0 holds nothing
+minigame_actions = {
+    "fooddrop": [(), (pygame.K_a,), (pygame.K_d,)],
+    "jetpou": [(), (pygame.K_SPACE,)],
+    "skyhop": [(), (pygame.K_a,), (pygame.K_d,)],
+}
+
+
+# pou's x, the fall speed and the positions of the falling items, nearest first, missing items are far above
+def observe_food_drop(game):
+    observation = [game.x, game.food_vel]
+    for pool, count in ((game.food_pool, game.food_count), (game.trash_pool, game.trash_count)):
+        items = sorted(pool, key=lambda item: -item.rect.y)
+        for index in range(count):
+            rect = items[index].rect if index < len(items) else None
+            observation += (rect.x, rect.y) if rect is not None else (0, -1000)
+    return observation
+
+
+# pou's height and speed, the distance to the next pair of trees and the top and bottom of its gap
+def observe_jet_pou(game):
+    ahead = [pair for pair in game.trees if pair.upper.right > game.x]
+    pair = min(ahead, key=lambda pair: pair.upper.x)
+    return [game.y, game.gravity, pair.upper.x - game.x, pair.upper.bottom, pair.lower.top]
+
+
+# pou's x, the time used up, the step of the next row and whether pou is in the air
+def observe_sky_hop(game):
+    row = game.first_row
+    while game.row_y(row) >= game.y:
+        row += 1
+    return [game.x, game.time_elapsed, game.step_x(row), float(game.move_pou)]
+
+
+observers = {"fooddrop": observe_food_drop, "jetpou": observe_jet_pou, "skyhop": observe_sky_hop}
+
+
+# lists of rows become one array when numpy is installed
+def as_batch(rows):
+    return numpy.asarray(rows, dtype=numpy.float32) if numpy is not None else rows
+
+
+# gym style environment around one minigame, an action is an index into minigame_actions, the reward is the
+# score gained and params override the game's tuning attributes like score_per_speedup or jump_strength
+class MinigameEnv:
+    def __init__(self, name, seed=0, max_ticks=None, params=None):
+        init_headless()
+        self.name = name
+        self.actions = minigame_actions[name]
+        self.observe = observers[name]
+        self.seed = seed
+        self.max_ticks = max_ticks
+        self.keys = ()
+        self.game = minigame_classes[name](None, random.Random(), ScriptedInput(lambda tick: self.keys))
+        for attribute, value in (params or {}).items():
+            if not hasattr(self.game, attribute):
+                raise ValueError(f"{name} has no parameter {attribute}")
+            setattr(self.game, attribute, value)
+        self.episodes = 0
+        self.ticks = 0
+
+    # every episode gets the next seed unless one is given
+    def reset(self, seed=None):
+        if seed is None:
+            seed = self.seed + self.episodes
+        self.episodes += 1
+        self.ticks = 0
+        self.keys = ()
+        start_run(self.game, seed)
+        return self.observe(self.game)
+
+    def step(self, action):
+        self.keys = self.actions[action]
+        score = self.game.score
+        self.game.input.begin_tick()
+        self.game.update()
+        self.ticks += 1
+        done = self.game.is_game_over or (self.max_ticks is not None and self.ticks >= self.max_ticks)
+        return self.observe(self.game), self.game.score - score, done, {"score": self.game.score, "ticks": self.ticks}
+
+
+# finished episodes start over right away, the observation is then the first one of the new episode
+def step_and_reset(env, action):
+    observation, reward, done, info = env.step(action)
+    if done:
+        observation = env.reset()
+    return observation, reward, done, info
+
+
+# runs in a worker process and steps its share of the environments on request
+def run_worker(connection, name, seeds, max_ticks, params):
+    envs = [MinigameEnv(name, seed, max_ticks, params) for seed in seeds]
+    while True:
+        command, data = connection.recv()
+        if command == "reset":
+            connection.send([env.reset() for env in envs])
+        elif command == "step":
+            connection.send([step_and_reset(env, action) for env, action in zip(envs, data)])
+        else:
+            break
+    connection.close()
+
+
+# steps count independent environments at once, in this process or split across worker processes
+class VectorEnv:
+    def __init__(self, name, count, seed=0, max_ticks=None, params=None, processes=0):
+        rng = random.Random(seed)
+        seeds = [rng.getrandbits(32) for _ in range(count)]
+        self.count = count
+        self.envs = []
+        self.workers = []
+        processes = min(processes, count)
+        if processes:
+            # each worker gets a contiguous slice of the environments
+            for index in range(processes):
+                chunk = seeds[index * count // processes:(index + 1) * count // processes]
+                connection, worker_connection = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=run_worker, daemon=True,
+                                                  args=(worker_connection, name, chunk, max_ticks, params))
+                process.start()
+                self.workers.append((process, connection, len(chunk)))
+        else:
+            self.envs = [MinigameEnv(name, env_seed, max_ticks, params) for env_seed in seeds]
+
+    def reset(self):
+        if self.workers:
+            for process, connection, size in self.workers:
+                connection.send(("reset", None))
+            observations = [observation for process, connection, size in self.workers
+                            for observation in connection.recv()]
+        else:
+            observations = [env.reset() for env in self.envs]
+        return as_batch(observations)
+
+    # returns the observations, rewards, done flags and infos of all environments
+    def step(self, actions):
+        actions = list(actions)
+        if self.workers:
+            start = 0
+            for process, connection, size in self.workers:
+                connection.send(("step", actions[start:start + size]))
+                start += size
+            results = [result for process, connection, size in self.workers for result in connection.recv()]
+        else:
+            results = [step_and_reset(env, action) for env, action in zip(self.envs, actions)]
+        observations, rewards, dones, infos = zip(*results)
+        return as_batch(observations), as_batch(rewards), list(dones), list(infos)
+
+    def close(self):
+        for process, connection, size in self.workers:
+            connection.send(("close", None))
+            process.join()
+        self.workers = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure vectorized minigame environments with a random policy")
+    parser.add_argument("game", choices=list(minigame_classes))
+    parser.add_argument("--envs", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=0, help="worker processes, 0 steps in this process")
+    parser.add_argument("--steps", type=int, default=10000, help="steps of every environment")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    env = VectorEnv(args.game, args.envs, args.seed, processes=args.processes)
+    rng = random.Random(args.seed)
+    action_count = len(minigame_actions[args.game])
+    scores = []
+
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        observations, rewards, dones, infos = env.step([rng.randrange(action_count) for _ in range(args.envs)])
+        scores += [info["score"] for done, info in zip(dones, infos) if done]
+    elapsed = time.perf_counter() - start
+    env.close()
+
+    frames = args.steps * args.envs
+    print(f"{args.game}: {frames} frames in {elapsed:.1f} s, {frames / elapsed * 60:,.0f} frames/min, "
+          f"{len(scores)} episodes, mean score {sum(scores) / max(len(scores), 1):.2f}")
+
+
+if __name__ == "__main__":
+    main()
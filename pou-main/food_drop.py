@@ -1,36 +1,68 @@
+import math
 import pygame
 import random
+from assets import assets
+from composites import composites, squash_scale, SKIN
+from inputs import keyboard
+from text_cache import text_cache
+from audio import audio
+from collision import SpatialGrid
+from entities import ItemPool
+from particles import ParticleSystem
+from masks import masks, masks_overlap, POU_MASK_IMAGE
 from food_images import food_images_list
 from trash_images import trash_images_list
-from minigames_functions import draw_game_over_menu, draw_score, play_sound, stop_sound
+from storage import storage
+from minigames_functions import draw_game_over_menu, draw_score
 from constants import CHARACTER_WIDTH, CHARACTER_HEIGHT, SCREEN_WIDTH, SCREEN_HEIGHT, FOOD_IMAGE_WIDTH, \
-    FOOD_IMAGE_HEIGHT, SMALL_FONT, FOOD_DROP_SOUND, EAT_SOUND, GAME_OVER_SOUND
+    FOOD_IMAGE_HEIGHT, SMALL_FONT, FOOD_DROP_SOUND, EAT_SOUND, GAME_OVER_SOUND, PRECISE_COLLISION, \
+    UPDATE_RATE
 
 
 class FoodDropGame:
-    food_drop_background = pygame.image.load("food_drop/food_drop_background.png")
+    name = "fooddrop"
+    food_drop_background = "food_drop/food_drop_background.png"
     character_vel = 15
+    pou_layers = ((SKIN, (CHARACTER_WIDTH, CHARACTER_HEIGHT), (0, 0)),)
+    food_count, trash_count = 2, 1
 
-    def __init__(self, screen):
+    # items fall start_food_vel pixels per tick, one more for every score_per_speedup points
+    start_food_vel = 3
+    score_per_speedup = 5
+
+    # pou squashes and then stretches by up to eat_bounce of its height for bounce_ticks after eating
+    eat_bounce = 0.15
+    bounce_ticks = 16
+    preload_assets = [food_drop_background, *food_images_list, *trash_images_list, EAT_SOUND, GAME_OVER_SOUND]
+
+    def __init__(self, screen, rng=None, input_source=None):
         self.screen = screen
+        self.rng = rng or random.Random()
+        self.input = input_source or keyboard
         self.x = 550
+        self.prev_x = self.x
         self.y = 380
+        self.pou_rect = pygame.Rect(self.x, self.y, CHARACTER_WIDTH, CHARACTER_HEIGHT)
         self.score = 0
         self.missed = 0
-        self.food_vel = 3
-        self.food_list = []
-        self.trash_list = []
-        self.is_game_over = False
 
-    def draw_game(self, skin, audio_enabled):
-        self.screen.blit(self.food_drop_background, (0, 0))
+        # ticks left of the bounce after eating
+        self.bounce = 0
+        self.particles = ParticleSystem(enabled=screen is not None)
+        self.food_vel = self.start_food_vel
+        self.food_pool = None
+        self.trash_pool = None
+        self.size_pools()
+        self.grid = SpatialGrid()
+
+        # test the sprite pixels of the items whose rects touch pou
+        self.precise_collision = PRECISE_COLLISION
+        self.is_game_over = False
 
+    def update(self):
         if self.is_game_over:
-            # draw game over prompts
-            draw_game_over_menu(self.screen, self.score)
-
             # enter key to start again
-            keys_pressed = pygame.key.get_pressed()
+            keys_pressed = self.input.get_pressed()
             if keys_pressed[pygame.K_RETURN]:
                 self.set_starting_values()
 
@@ -39,89 +71,145 @@ class FoodDropGame:
                 self.set_starting_values()
                 return "minigames"
 
-        # draw the game if not game over
+        # update the game if not game over
         else:
-            if not pygame.mixer.get_busy():
-                play_sound(FOOD_DROP_SOUND, audio_enabled)
+            audio.play_music(FOOD_DROP_SOUND)
+            self.prev_x = self.x
+            if self.bounce:
+                self.bounce -= 1
+            self.particles.update(1 / UPDATE_RATE)
             self.keys_handler()
-            self.screen.blit(skin, (self.x, self.y))
-            self.draw_food(audio_enabled)
-            self.draw_trash(audio_enabled)
-            draw_score(self.screen, self.score)
-            missed_text = SMALL_FONT.render(f"Missed: {self.missed}/5", True, "black")
-            self.screen.blit(missed_text, (SCREEN_WIDTH - missed_text.get_width() - 50, 50))
+            self.pou_rect.x = self.x
+            self.update_food()
+            self.update_trash()
 
             # escape key to return to main menu
-            keys_pressed = pygame.key.get_pressed()
+            keys_pressed = self.input.get_pressed()
             if keys_pressed[pygame.K_ESCAPE]:
                 self.set_starting_values()
-                stop_sound(FOOD_DROP_SOUND, audio_enabled)
+                audio.stop_music()
                 return "minigames"
 
+    def render(self, skin, alpha):
+        self.screen.set_background(assets.get(self.food_drop_background))
+
+        # draw game over prompts
+        if self.is_game_over:
+            draw_game_over_menu(self.screen, self.score, storage.top_scores(self.name))
+
+        # draw the game if not game over, falling items are drawn between the previous and the current tick
+        else:
+            bounce = self.eat_bounce * math.sin(2 * math.pi * max(self.bounce - alpha, 0) / self.bounce_ticks)
+            pou, offset = composites.frame(skin, self.pou_layers, scale=squash_scale(-bounce))
+            self.screen.blit(pou, (self.prev_x + (self.x - self.prev_x) * alpha + offset[0], self.y + offset[1]))
+            offset = self.food_vel * (1 - alpha)
+            for pool in (self.food_pool, self.trash_pool):
+                for item in pool:
+                    self.screen.blit(assets.get(item.image), (item.rect.x, item.rect.y - offset))
+            self.particles.draw(self.screen, alpha)
+            draw_score(self.screen, self.score)
+            text_cache.draw_number(self.screen, SMALL_FONT, "black", (SCREEN_WIDTH - 50, 50), self.missed,
+                                   "Missed: ", "/5", right=True)
+
     # pou movement
     def keys_handler(self):
-        keys_pressed = pygame.key.get_pressed()
+        keys_pressed = self.input.get_pressed()
         if keys_pressed[pygame.K_d] and self.x < SCREEN_WIDTH - CHARACTER_WIDTH:
             self.x += self.character_vel
         if keys_pressed[pygame.K_a] and self.x > 0:
             self.x -= self.character_vel
 
-    def draw_food(self, audio_enabled):
+    # a random image of the list at a random place above the screen, the hitbox is the same for every item and the
+    # sprite rect lets the pixel test cover sprites bigger than the hitbox
+    def spawn_item(self, pool, images):
+        image = images[self.rng.randint(0, len(images) - 1)]
+        pool.spawn(self.rng.randint(0, SCREEN_WIDTH - FOOD_IMAGE_WIDTH), self.rng.randint(-1000, -50),
+                   FOOD_IMAGE_WIDTH, FOOD_IMAGE_HEIGHT, image, assets.get(image).get_size())
+
+    def update_food(self):
         # add new food
-        if len(self.food_list) < 2:
-            food_image = food_images_list[random.randint(0, len(food_images_list) - 1)]
-            new_food = pygame.Rect(random.randint(0, SCREEN_WIDTH - FOOD_IMAGE_WIDTH),
-                                   random.randint(-1000, -50), FOOD_IMAGE_WIDTH, FOOD_IMAGE_HEIGHT)
-            self.food_list.append((new_food, food_image))
-
-        # draw food on screen, remove when goes under the screen or collides with pou, add score or missed points
-        for food in self.food_list:
-            self.screen.blit(food[1], (food[0].x, food[0].y))
-            food[0].y += self.food_vel
-            if food[0].y > SCREEN_HEIGHT:
+        if len(self.food_pool) < self.food_count:
+            self.spawn_item(self.food_pool, food_images_list)
+
+        # move food, release when goes under the screen and add missed points
+        for food in self.food_pool:
+            food.rect.y += self.food_vel
+            if food.rect.y > SCREEN_HEIGHT:
                 self.missed += 1
-                self.food_list.remove(food)
-            if food[0].colliderect(pygame.Rect(self.x, self.y, CHARACTER_WIDTH, CHARACTER_HEIGHT)):
-                self.food_list.remove(food)
-                self.score += 1
-                play_sound(EAT_SOUND, audio_enabled)
+                self.food_pool.release(food)
+        self.food_pool.sweep()
+
+        # eat the food that collides with pou and add score
+        for food in self.collisions(self.food_pool):
+            self.food_pool.release(food)
+            self.score += 1
+            self.bounce = self.bounce_ticks
+            self.particles.emit("crumbs", *food.rect.center)
+            audio.play_sfx(EAT_SOUND)
+        self.food_pool.sweep()
 
         # end the game when pou misses 5 foods
         if self.missed > 4:
             self.is_game_over = True
-            play_sound(GAME_OVER_SOUND, audio_enabled)
-            stop_sound(FOOD_DROP_SOUND, audio_enabled)
+            audio.play_sfx(GAME_OVER_SOUND)
+            audio.stop_music()
 
         # increase the food velocity
-        self.food_vel = self.score / 5 + 3
+        self.food_vel = self.score / self.score_per_speedup + self.start_food_vel
 
-    def draw_trash(self, audio_enabled):
+    def update_trash(self):
         # add new trash
-        if len(self.trash_list) < 1:
-            trash_image = trash_images_list[random.randint(0, len(trash_images_list) - 1)]
-            new_trash = pygame.Rect(random.randint(0, SCREEN_WIDTH - FOOD_IMAGE_WIDTH),
-                                    random.randint(-1000, -50), FOOD_IMAGE_WIDTH, FOOD_IMAGE_HEIGHT)
-            self.trash_list.append((new_trash, trash_image))
-
-        # draw trash on screen, removes when goes under the screen or collides with pou
-        for trash in self.trash_list:
-            self.screen.blit(trash[1], (trash[0].x, trash[0].y))
-            trash[0].y += self.food_vel
-            if trash[0].y > SCREEN_HEIGHT:
-                self.trash_list.remove(trash)
-
-            # end the game when pou collides with trash
-            if trash[0].colliderect(pygame.Rect(self.x, self.y, CHARACTER_WIDTH, CHARACTER_HEIGHT)):
-                self.is_game_over = True
-                play_sound(GAME_OVER_SOUND, audio_enabled)
-                stop_sound(FOOD_DROP_SOUND, audio_enabled)
+        if len(self.trash_pool) < self.trash_count:
+            self.spawn_item(self.trash_pool, trash_images_list)
+
+        # move trash, release when goes under the screen
+        for trash in self.trash_pool:
+            trash.rect.y += self.food_vel
+            if trash.rect.y > SCREEN_HEIGHT:
+                self.trash_pool.release(trash)
+        self.trash_pool.sweep()
+
+        # end the game when pou collides with trash
+        if self.collisions(self.trash_pool):
+            self.is_game_over = True
+            audio.play_sfx(GAME_OVER_SOUND)
+            audio.stop_music()
+
+    # items of a pool colliding with pou, the hitboxes are tested by default and the sprite pixels in precise mode,
+    # with the sprite rects as the broad phase
+    def collisions(self, pool):
+        if not self.precise_collision:
+            self.grid.rebuild((item.rect, item) for item in pool)
+            return self.grid.query(self.pou_rect)
+
+        for item in pool:
+            item.sprite_rect.topleft = item.rect.topleft
+        self.grid.rebuild((item.sprite_rect, item) for item in pool)
+        found = self.grid.query(self.pou_rect)
+        if found:
+            pou_mask = masks.get(POU_MASK_IMAGE, (CHARACTER_WIDTH, CHARACTER_HEIGHT))
+            found = [item for item in found if
+                     masks_overlap(pou_mask, self.pou_rect.topleft, masks.get(item.image), item.sprite_rect.topleft)]
+        return found
+
+    # pools as big as the item counts, rebuilt only when a count was changed
+    def size_pools(self):
+        if self.food_pool is None or self.food_pool.size != self.food_count:
+            self.food_pool = ItemPool(self.food_count)
+        if self.trash_pool is None or self.trash_pool.size != self.trash_count:
+            self.trash_pool = ItemPool(self.trash_count)
 
     def set_starting_values(self):
         self.x = 550
+        self.prev_x = self.x
         self.y = 380
         self.score = 0
         self.missed = 0
-        self.food_vel = 3
-        self.food_list = []
-        self.trash_list = []
+        self.bounce = 0
+        self.particles.clear()
+        self.pou_rect.x = self.x
+        self.food_vel = self.start_food_vel
+        self.size_pools()
+        self.food_pool.clear()
+        self.trash_pool.clear()
         self.is_game_over = False
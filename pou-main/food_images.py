@@ -1,16 +1,14 @@
-import pygame
-
-APPLE_JUICE_IMAGE = pygame.image.load("food_drop/food/apple_juice.png")
-BACON_IMAGE = pygame.image.load("food_drop/food/bacon.png")
-BANANA_IMAGE = pygame.image.load("food_drop/food/banana.png")
-BROCCOLI_IMAGE = pygame.image.load("food_drop/food/broccoli.png")
-BURGER_IMAGE = pygame.image.load("food_drop/food/burger.png")
-CABBAGE_IMAGE = pygame.image.load("food_drop/food/cabbage.png")
-CANDY_CANE_IMAGE = pygame.image.load("food_drop/food/candy_cane.png")
-CHEESE_CAKE_IMAGE = pygame.image.load("food_drop/food/cheese_cake.png")
-CHICKEN_LEG_IMAGE = pygame.image.load("food_drop/food/chicken_leg.png")
-CHILI_PEPPER_IMAGE = pygame.image.load("food_drop/food/chili_pepper.png")
-CHOCOLATE_BAR_IMAGE = pygame.image.load("food_drop/food/chocolate_bar.png")
+APPLE_JUICE_IMAGE = "food_drop/food/apple_juice.png"
+BACON_IMAGE = "food_drop/food/bacon.png"
+BANANA_IMAGE = "food_drop/food/banana.png"
+BROCCOLI_IMAGE = "food_drop/food/broccoli.png"
+BURGER_IMAGE = "food_drop/food/burger.png"
+CABBAGE_IMAGE = "food_drop/food/cabbage.png"
+CANDY_CANE_IMAGE = "food_drop/food/candy_cane.png"
+CHEESE_CAKE_IMAGE = "food_drop/food/cheese_cake.png"
+CHICKEN_LEG_IMAGE = "food_drop/food/chicken_leg.png"
+CHILI_PEPPER_IMAGE = "food_drop/food/chili_pepper.png"
+CHOCOLATE_BAR_IMAGE = "food_drop/food/chocolate_bar.png"
 
 food_images_list = [
     APPLE_JUICE_IMAGE, BACON_IMAGE, BANANA_IMAGE, BROCCOLI_IMAGE, BURGER_IMAGE, CABBAGE_IMAGE, CANDY_CANE_IMAGE,
@@ -0,0 +1,54 @@
+import pygame
+from constants import UPDATE_RATE, MAX_FPS, MAX_FRAME_TIME
+
+
+# fixed timestep loop, the simulation advances in constant ticks and rendering interpolates between them
+class GameLoop:
+    def __init__(self, handle_events, update, render, update_rate=UPDATE_RATE, max_fps=MAX_FPS, profiler=None,
+                 is_idle=None):
+        self.handle_events = handle_events
+        self.update = update
+        self.render = render
+        self.profiler = profiler
+
+        # when it returns True handle_events may block waiting for input
+        self.is_idle = is_idle
+        if profiler is not None:
+            self.handle_events = profiler.timed("events", handle_events)
+            self.update = profiler.timed("update", update)
+            self.render = profiler.timed("render", render)
+        self.dt = 1 / update_rate
+        self.max_fps = max_fps
+        self.clock = pygame.time.Clock()
+        self.accumulator = 0
+        self.running = False
+
+    def run(self):
+        self.running = True
+        self.clock.tick()
+        while self.running:
+            # limit the render rate and clamp long frames so the simulation can catch up
+            frame_time = self.clock.tick(self.max_fps) / 1000
+            if self.profiler is not None:
+                self.profiler.begin_frame()
+            self.accumulator += min(frame_time, MAX_FRAME_TIME)
+
+            waited = self.is_idle is not None and self.is_idle()
+            self.handle_events()
+
+            # the time spent waiting for input is not simulated, or the first ticks after it would run at once
+            if waited:
+                self.clock.tick()
+                self.accumulator = 0
+
+            # run as many fixed updates as the elapsed time allows
+            while self.running and self.accumulator >= self.dt:
+                self.update()
+                self.accumulator -= self.dt
+
+            # render between the last two simulation states
+            if self.running:
+                self.render(self.accumulator / self.dt)
+
+    def stop(self):
+        self.running = False
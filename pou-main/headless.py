@@ -0,0 +1,89 @@
+import os
+
+# the dummy drivers have to be selected before pygame is initialised
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import random
+import time
+import pygame
+from audio import audio
+from inputs import RandomKeys, ScriptedInput
+from minigames import minigame_classes, start_run
+from replay import ReplayInput, load_replay
+
+# keys a random player chooses from in each minigame, None means no key
+minigame_keys = {
+    "fooddrop": [pygame.K_a, pygame.K_d, None],
+    "jetpou": [pygame.K_SPACE, None],
+    "skyhop": [pygame.K_a, pygame.K_d, None],
+}
+
+
+# images are converted to the display format, so even a headless run needs a (dummy) display mode
+def init_headless():
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+    audio.set_enabled(False)
+
+
+# create a minigame with a seeded rng and scripted input, nothing is ever drawn
+def create_game(name, seed=0, script=None):
+    init_headless()
+    script = script or RandomKeys(minigame_keys[name], seed)
+    return minigame_classes[name](None, random.Random(seed), ScriptedInput(script))
+
+
+# run the simulation of a minigame for a number of ticks, returns the game and the ticks that were run
+def run_game(game, ticks, stop_on_game_over=True):
+    for tick in range(ticks):
+        game.input.begin_tick()
+        game.update()
+        if stop_on_game_over and game.is_game_over:
+            return game, tick + 1
+    return game, ticks
+
+
+# replay recorded inputs as fast as possible, the final score shows whether the run can be reproduced
+def run_replay(replay):
+    init_headless()
+    replay_input = ReplayInput(replay)
+    game = minigame_classes[replay.game](None, random.Random(), replay_input)
+    start_run(game, replay.seed)
+    while not replay_input.finished():
+        replay_input.begin_tick()
+        if game.update() == "minigames":
+            break
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the minigames without a window")
+    parser.add_argument("games", nargs="*", metavar="game", help=f"any of {', '.join(minigame_classes)}")
+    parser.add_argument("--ticks", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", metavar="PATH", help="verify a recorded run instead")
+    args = parser.parse_args()
+
+    if args.replay:
+        replay = load_replay(args.replay)
+        game = run_replay(replay)
+        result = "verified" if game.score == replay.score else "MISMATCH"
+        print(f"{replay.game}: replayed {len(replay.ticks)} ticks (seed {replay.seed}), "
+              f"score {game.score}, recorded {replay.score}, {result}")
+        return
+    for name in args.games:
+        if name not in minigame_classes:
+            parser.error(f"unknown game {name}")
+    args.games = args.games or list(minigame_classes)
+
+    for name in args.games:
+        start = time.perf_counter()
+        game, ticks = run_game(create_game(name, args.seed), args.ticks)
+        elapsed = time.perf_counter() - start
+        print(f"{name}: score {game.score} after {ticks} ticks (seed {args.seed}), {ticks / elapsed:.0f} ticks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import pygame
+import random
+from constants import KEY_BINDINGS
+
+
+# key state that can be indexed with key constants like the result of pygame.key.get_pressed()
+class KeyState:
+    def __init__(self, keys):
+        self.keys = keys
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+
+# live keyboard input, main passes every event to it once per frame and each tick sees the keys held and the
+# keys pressed and released since the previous tick, bindings map extra keys to the keys the games read
+class KeyboardInput:
+    def __init__(self, bindings=KEY_BINDINGS):
+        self.bindings = dict(bindings)
+
+        # physical keys that are down and edges waiting for the next tick
+        self.down = set()
+        self.pending_pressed = []
+        self.pending_released = []
+
+        # state of the current tick
+        self.held = KeyState(frozenset())
+        self.pressed = []
+        self.released = []
+
+    def bind(self, key, game_key):
+        self.bindings[key] = game_key
+
+    def unbind(self, key):
+        self.bindings.pop(key, None)
+
+    def process_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            self.down.add(event.key)
+            self.pending_pressed.append(self.bindings.get(event.key, event.key))
+        elif event.type == pygame.KEYUP:
+            self.down.discard(event.key)
+            self.pending_released.append(self.bindings.get(event.key, event.key))
+        elif event.type == pygame.WINDOWFOCUSLOST:
+            # key ups are not reported while the window is in the background
+            self.down.clear()
+
+    # forget key presses that happened while no game was running
+    def flush(self):
+        self.pending_pressed.clear()
+        self.pending_released.clear()
+
+    def begin_tick(self):
+        self.pressed, self.pending_pressed = self.pending_pressed, []
+        self.released, self.pending_released = self.pending_released, []
+
+        # a key tapped between two ticks still counts as held for one tick
+        held = {self.bindings.get(key, key) for key in self.down}
+        held.update(self.pressed)
+        self.held = KeyState(held)
+
+    def get_pressed(self):
+        return self.held
+
+    def get_keydowns(self):
+        return self.pressed
+
+    def get_keyups(self):
+        return self.released
+
+
+# keys held on each tick come from a script, so runs can be repeated and need no window
+class ScriptedInput:
+    def __init__(self, script):
+        self.script = script
+        self.tick = -1
+        self.held = frozenset()
+        self.previous = frozenset()
+
+    def begin_tick(self):
+        self.tick += 1
+        self.previous = self.held
+        self.held = frozenset(self.script(self.tick))
+
+    def get_pressed(self):
+        return KeyState(self.held)
+
+    def get_keydowns(self):
+        return list(self.held - self.previous)
+
+    def get_keyups(self):
+        return list(self.previous - self.held)
+
+
+# script holding a random choice from keys for a few ticks at a time, None holds nothing
+class RandomKeys:
+    def __init__(self, keys, seed=0, hold=10):
+        self.keys = keys
+        self.rng = random.Random(seed)
+        self.hold = hold
+        self.held = ()
+
+    def __call__(self, tick):
+        if tick % self.hold == 0:
+            key = self.rng.choice(self.keys)
+            self.held = () if key is None else (key,)
+        return self.held
+
+
+keyboard = KeyboardInput()
@@ -1,48 +1,82 @@
+import math
 import pygame
 import random
-from constants import SCREEN_HEIGHT, JET_POU_SOUND, GAME_OVER_SOUND, JETPACK_SOUND
-from minigames_functions import draw_game_over_menu, draw_score, play_sound, stop_sound
+from assets import assets
+from composites import composites, SKIN
+from inputs import keyboard
+from audio import audio
+from collision import SpatialGrid
+from entities import TreeRing
+from masks import masks, masks_overlap, POU_MASK_IMAGE
+from particles import ParticleSystem
+from parallax import Parallax, ParallaxLayer
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, UPDATE_RATE, JET_POU_SOUND, GAME_OVER_SOUND, JETPACK_SOUND, \
+    PRECISE_COLLISION
+from storage import storage
+from minigames_functions import draw_game_over_menu, draw_score
 
 
 class JetPouGame:
-    jet_pou_background = pygame.image.load("jet_pou/jet_pou_background.png")
-    jet_pou_grass = pygame.image.load("jet_pou/jet_pou_grass.png")
-    jet_pou_tree_upper = pygame.image.load("jet_pou/tree_upper.png")
-    jet_pou_tree_lower = pygame.image.load("jet_pou/tree_lower.png")
-    jetpack = pygame.image.load("jet_pou/jetpack.png")
+    name = "jetpou"
+    jet_pou_background = "jet_pou/jet_pou_background.png"
+    jet_pou_grass = "jet_pou/jet_pou_grass.png"
+    jet_pou_tree_upper = "jet_pou/tree_upper.png"
+    jet_pou_tree_lower = "jet_pou/tree_lower.png"
+    jetpack = "jet_pou/jetpack.png"
+    preload_assets = [jet_pou_background, jet_pou_grass, jet_pou_tree_upper, jet_pou_tree_lower, jetpack,
+                      JETPACK_SOUND, GAME_OVER_SOUND]
     pou_width, pou_height = 50, 50
 
-    def __init__(self, screen):
+    # the jetpack hangs off pou's back, drawn as one sprite with the skin
+    pou_layers = ((jetpack, (pou_width - 15, pou_height - 20), (-20, 0)), (SKIN, (pou_width, pou_height), (0, 0)))
+    background_vel, grass_vel, trees_vel = 1, 2, 2
+    jump_strength, fall_acceleration = -5, 0.15
+
+    # pou leans back while rising and tips forward while falling, by tilt_per_speed degrees per pixel per tick
+    tilt_per_speed = 4
+    max_tilt = 30
+
+    # the background image repeats every 1200 pixels
+    background_period = 1200
+
+    # horizontal distance between tree pairs, lower it for more trees, and the height of the gap in each pair
+    tree_spacing = 400
+    tree_gap = 150
+    first_tree_x = 1000
+
+    def __init__(self, screen, rng=None, input_source=None):
         self.screen = screen
+        self.rng = rng or random.Random()
+        self.input = input_source or keyboard
+        self.tree_width, self.tree_height = assets.get(self.jet_pou_tree_upper).get_size()
+        self.grass_height = assets.get(self.jet_pou_grass).get_height()
         self.x = 200
         self.y = 100
-        self.background_rect = self.jet_pou_background.get_rect()
-        self.grass_rect = self.jet_pou_grass.get_rect()
+        self.prev_y = self.y
+        self.hitbox = pygame.Rect(self.x, self.y + 10, self.pou_width, self.pou_height - 20)
+        self.grid = SpatialGrid()
+
+        # with precise collision pou's whole rect is the broad phase and the sprite pixels decide
+        self.precise_collision = PRECISE_COLLISION
+        self.pou_rect = pygame.Rect(self.x, self.y, self.pou_width, self.pou_height)
+
+        # background and grass scroll at their speed in pixels per second
+        self.parallax = Parallax([
+            ParallaxLayer(self.jet_pou_background, self.background_vel * UPDATE_RATE,
+                          period=self.background_period),
+            ParallaxLayer(self.jet_pou_grass, self.grass_vel * UPDATE_RATE, (0, SCREEN_HEIGHT - self.grass_height))])
+        self.particles = ParticleSystem(enabled=screen is not None)
         self.score = 0
         self.gravity = 1
-        self.jump_strength = -5
-        self.upper_trees_list = []
-        for i in range(1000, 2201, 400):
-            self.upper_trees_list.append(
-                pygame.Rect(i, random.randint(-400, 0), self.jet_pou_tree_upper.get_width(),
-                            self.jet_pou_tree_upper.get_height()))
-        self.lower_trees_list = []
-        for i in range(len(self.upper_trees_list)):
-            self.lower_trees_list.append(
-                pygame.Rect(self.upper_trees_list[i][0], self.upper_trees_list[i].y + 580,
-                            self.jet_pou_tree_lower.get_width(), self.jet_pou_tree_lower.get_height()))
+        self.trees = None
+        self.place_trees()
         self.can_jump = True
         self.is_game_over = False
 
-    def draw_game(self, skin, audio_enabled):
-        skin = pygame.transform.scale(skin, (self.pou_width, self.pou_height))
+    def update(self):
         if self.is_game_over:
-            self.screen.blit(self.jet_pou_background, (0, 0))
-            self.screen.blit(self.jet_pou_grass, (0, SCREEN_HEIGHT - self.jet_pou_grass.get_height()))
-            draw_game_over_menu(self.screen, self.score)
-
             # enter key to start again
-            keys_pressed = pygame.key.get_pressed()
+            keys_pressed = self.input.get_pressed()
             if keys_pressed[pygame.K_RETURN]:
                 self.set_starting_values()
 
@@ -51,50 +85,60 @@ class JetPouGame:
                 self.set_starting_values()
                 return "minigames"
         else:
-            if not pygame.mixer.get_busy():
-                play_sound(JET_POU_SOUND, audio_enabled)
-            self.draw_moving_background()
-            self.draw_moving_grass()
-            self.draw_trees(audio_enabled)
-            self.draw_pou(skin, audio_enabled)
-
-            draw_score(self.screen, self.score)
+            audio.play_music(JET_POU_SOUND)
+            self.parallax.update(1 / UPDATE_RATE)
+            self.particles.update(1 / UPDATE_RATE)
+            self.update_trees()
+            self.update_pou()
 
             # escape key to return to main menu
-            keys_pressed = pygame.key.get_pressed()
+            keys_pressed = self.input.get_pressed()
             if keys_pressed[pygame.K_ESCAPE]:
                 self.set_starting_values()
-                stop_sound(JET_POU_SOUND, audio_enabled)
+                audio.stop_music()
                 return "minigames"
 
-    def draw_moving_background(self):
-        self.screen.blit(self.jet_pou_background, (self.background_rect.x, 0))
-        self.background_rect.x -= 1
-        if self.background_rect.x == -1200:
-            self.background_rect.x = 0
+    def render(self, skin, alpha):
+        if self.is_game_over:
+            self.parallax.draw(self.screen)
+            draw_game_over_menu(self.screen, self.score, storage.top_scores(self.name))
+        else:
+            # scrolling objects are drawn between the previous and the current tick
+            remaining = 1 - alpha
+            self.parallax.draw(self.screen, alpha)
+            tree_upper, tree_lower = assets.get(self.jet_pou_tree_upper), assets.get(self.jet_pou_tree_lower)
+            for pair in self.trees:
+                x = pair.upper.x + self.trees_vel * remaining
+                self.screen.blit(tree_upper, (x, pair.upper.y))
+                self.screen.blit(tree_lower, (x, pair.lower.y))
+            self.particles.draw(self.screen, alpha)
+            self.draw_pou(skin, self.prev_y + (self.y - self.prev_y) * alpha)
 
-    def draw_moving_grass(self):
-        self.screen.blit(self.jet_pou_grass, (self.grass_rect.x, SCREEN_HEIGHT - self.jet_pou_grass.get_height()))
-        self.grass_rect.x -= 2
-        if self.grass_rect.x == -1200:
-            self.grass_rect.x = 0
+            draw_score(self.screen, self.score)
 
-    def draw_pou(self, skin, audio_enabled):
+    def draw_pou(self, skin, y):
         # draw jetpack and skin
-        self.jetpack = pygame.transform.scale(self.jetpack, (self.pou_width - 15, self.pou_height - 20))
-        self.screen.blit(self.jetpack, (self.x - 20, self.y))
-        self.screen.blit(skin, (self.x, self.y))
+        angle = max(-self.max_tilt, min(self.max_tilt, -self.gravity * self.tilt_per_speed))
+        pou, offset = composites.frame(skin, self.pou_layers, angle)
+        self.screen.blit(pou, (self.x + offset[0], y + offset[1]))
+
+    def update_pou(self):
+        self.prev_y = self.y
 
         # jumping
-        keys_pressed = pygame.key.get_pressed()
+        keys_pressed = self.input.get_pressed()
         if keys_pressed[pygame.K_SPACE] and self.can_jump and self.y > 20:
-            play_sound(JETPACK_SOUND, audio_enabled)
+            audio.play_sfx(JETPACK_SOUND)
             self.gravity = self.jump_strength
             self.can_jump = False
 
+        # the jetpack fires while pou is rising
+        if self.gravity < 0:
+            self.particles.emit("thrust", self.x - 3, self.y + self.pou_height - 20)
+
         # falling
         self.y += self.gravity
-        self.gravity += 0.15
+        self.gravity += self.fall_acceleration
 
         # reset jump availability when space is released
         if not keys_pressed[pygame.K_SPACE]:
@@ -103,59 +147,59 @@ class JetPouGame:
         # game over if pou falls off the screen
         if self.y > 550:
             self.is_game_over = True
-            play_sound(GAME_OVER_SOUND, audio_enabled)
-            stop_sound(JET_POU_SOUND, audio_enabled)
-
-    def draw_trees(self, audio_enabled):
-        # draw upper trees, add score and upper and lower trees if a tree goes off the screen
-        for tree in self.upper_trees_list:
-            tree.x -= 2
-            self.screen.blit(self.jet_pou_tree_upper, (tree.x, tree.y))
-            if tree.x < -1 * self.jet_pou_tree_upper.get_width():
-                self.upper_trees_list.remove(tree)
-                self.upper_trees_list.append(
-                    pygame.Rect(self.upper_trees_list[-1].x + 400, random.randint(-400, 0),
-                                self.jet_pou_tree_upper.get_width(), self.jet_pou_tree_upper.get_height()))
-                self.lower_trees_list.append(
-                    pygame.Rect(self.upper_trees_list[-1].x, self.upper_trees_list[-1].y + 600,
-                                self.jet_pou_tree_lower.get_width(), self.jet_pou_tree_lower.get_height()))
-                self.score += 1
-
-            # game over if pou collides with any of upper trees
-            if tree.colliderect(pygame.Rect(self.x, self.y + 10, self.pou_width, self.pou_height - 20)):
-                self.is_game_over = True
-                play_sound(GAME_OVER_SOUND, audio_enabled)
-                stop_sound(JET_POU_SOUND, audio_enabled)
-
-        # draw lower trees
-        for tree in self.lower_trees_list:
-            tree.x -= 2
-            self.screen.blit(self.jet_pou_tree_lower, (tree.x, tree.y))
-            if tree.x < -1 * self.jet_pou_tree_lower.get_width():
-                self.lower_trees_list.remove(tree)
-
-            # game over if pou collides with any of lower trees
-            if tree.colliderect(pygame.Rect(self.x, self.y + 10, self.pou_width, self.pou_height - 20)):
-                self.is_game_over = True
-                play_sound(GAME_OVER_SOUND, audio_enabled)
-                stop_sound(JET_POU_SOUND, audio_enabled)
+            audio.play_sfx(GAME_OVER_SOUND)
+            audio.stop_music()
+
+    # enough pairs that a recycled pair is always placed off the screen, reusing the ring if the count is unchanged
+    def place_trees(self):
+        count = math.ceil((SCREEN_WIDTH + self.tree_width) / self.tree_spacing)
+        if self.trees is None or len(self.trees) != count:
+            self.trees = TreeRing(count, self.tree_width, self.tree_height)
+        self.trees.reset()
+        for index, pair in enumerate(self.trees):
+            pair.place(self.first_tree_x + index * self.tree_spacing, self.rng.randint(-400, 0), self.tree_gap)
+
+    def update_trees(self):
+        # move the trees
+        for pair in self.trees:
+            pair.move(-self.trees_vel)
+
+        # add score and move the pair that went off the screen behind the last one
+        if self.trees.first_pair().upper.x < -1 * self.tree_width:
+            x = self.trees.last_pair().upper.x + self.tree_spacing
+            self.trees.recycle().place(x, self.rng.randint(-400, 0), self.tree_gap)
+            self.score += 1
+
+        # game over if pou collides with any of the trees
+        self.hitbox.y = self.y + 10
+        self.pou_rect.y = self.y
+        self.grid.clear()
+        for pair in self.trees:
+            self.grid.insert(pair.upper, pair)
+            self.grid.insert(pair.lower, pair)
+        if self.precise_collision:
+            hit = any(self.tree_pixels_hit(pair) for pair in self.grid.query(self.pou_rect))
+        else:
+            hit = bool(self.grid.query(self.hitbox))
+        if hit:
+            self.is_game_over = True
+            audio.play_sfx(GAME_OVER_SOUND)
+            audio.stop_music()
+
+    # pixel test of pou against both trees of a pair
+    def tree_pixels_hit(self, pair):
+        pou_mask = masks.get(POU_MASK_IMAGE, (self.pou_width, self.pou_height))
+        return (masks_overlap(pou_mask, self.pou_rect.topleft, masks.get(self.jet_pou_tree_upper), pair.upper.topleft)
+                or masks_overlap(pou_mask, self.pou_rect.topleft, masks.get(self.jet_pou_tree_lower),
+                                 pair.lower.topleft))
 
     def set_starting_values(self):
         self.y = 100
-        self.background_rect = self.jet_pou_background.get_rect()
-        self.grass_rect = self.jet_pou_grass.get_rect()
+        self.prev_y = self.y
+        self.parallax.reset()
+        self.particles.clear()
         self.score = 0
         self.gravity = 1
-        self.jump_strength = -5
-        self.upper_trees_list = []
-        for i in range(1000, 2201, 400):
-            self.upper_trees_list.append(
-                pygame.Rect(i, random.randint(-400, 0), self.jet_pou_tree_upper.get_width(),
-                            self.jet_pou_tree_upper.get_height()))
-        self.lower_trees_list = []
-        for i in range(len(self.upper_trees_list)):
-            self.lower_trees_list.append(
-                pygame.Rect(self.upper_trees_list[i][0], self.upper_trees_list[i].y + 580,
-                            self.jet_pou_tree_lower.get_width(), self.jet_pou_tree_lower.get_height()))
+        self.place_trees()
         self.can_jump = True
         self.is_game_over = False
@@ -1,164 +1,313 @@
+import time
+
+# measure the time to the first main menu frame from the very start
+startup_time = time.perf_counter()
+
+import argparse
+import random
 import pygame
 from button import Button
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT
-from food_drop import FoodDropGame
-from jet_pou import JetPouGame
-from sky_hop import SkyHopGame
-from skins_images import default_img, coat_img, panda_img, polo_img, pumpkin_img, t_shirt_img
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, LAZY_LOADING, DIRTY_RECTS, PERFORMANCE_SCALE
+from game_loop import GameLoop
+from profiler import Profiler
+from renderer import Renderer
+from inputs import keyboard
+from minigames import minigame_classes, start_run
+from replay import InputRecorder
+from scenes import Scene, MenuScene, OverlayMenuScene, SceneManager
+from skins_images import skin_images_list
+from assets import assets
+from composites import composites
+from audio import audio
+from storage import storage
+
+parser = argparse.ArgumentParser(description="Pou minigames")
+parser.add_argument("--startup-report", action="store_true", help="print the time it took to show the main menu")
+parser.add_argument("--dirty-rects", action="store_true", help="only update the changed parts of the screen")
+parser.add_argument("--record", action="store_true", help="save every run that ends in a game over as a replay")
+parser.add_argument("--precise-collision", action="store_true", help="collide on sprite pixels, not on boxes")
+parser.add_argument("--profile", action="store_true", help="time every frame, F3 shows the overlay")
+parser.add_argument("--performance", action="store_true", help="render at half resolution, for slow computers")
+parser.add_argument("--profile-export", metavar="PATH", help="write the frame times to a .csv or .json file on exit")
+args = parser.parse_args()
+
+# scores and settings are kept between launches
+storage.open()
+
+# graphics settings, performance mode draws everything at half the resolution
+selected_graphics = 1 if args.performance else int(storage.get_setting("graphics", 0))
+graphics_settings = {0: "Full", 1: "Performance"}
+
+# the window shows the logical screen scaled to fit, pygame.SCALED scales it on the gpu when a renderer is
+# available, otherwise the canvas is scaled onto a plain resizable window, games always draw in logical
+# SCREEN_WIDTH x SCREEN_HEIGHT coordinates whatever the canvas size
+scaled_display = True
+
+
+def open_display(window_size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+    global scaled_display
+    scale = PERFORMANCE_SCALE if selected_graphics == 1 else 1
+    size = (round(SCREEN_WIDTH * scale), round(SCREEN_HEIGHT * scale))
+    if scaled_display:
+        try:
+            return pygame.display.set_mode(size, pygame.SCALED | pygame.RESIZABLE), scale, None
+        except pygame.error:
+            scaled_display = False
+    window = pygame.display.set_mode(window_size, pygame.RESIZABLE)
+    if window.get_size() == size:
+        return window, scale, None
+    return pygame.Surface(size).convert(), scale, window
+
 
 pygame.init()
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("Pou")
-clock = pygame.time.Clock()
 
-BACKGROUND_IMAGE = pygame.image.load("background.png")
-bg_img = pygame.transform.scale(BACKGROUND_IMAGE, (SCREEN_WIDTH, SCREEN_HEIGHT))
+# everything is drawn through the renderer, optionally updating only the changed parts of the screen
+canvas, scale, window = open_display()
+renderer = Renderer(canvas, DIRTY_RECTS or args.dirty_rects, scale=scale, output=window)
+
+# optional frame timing of the loop phases and the minigames
+profiler = Profiler() if args.profile or args.profile_export else None
+if profiler is not None:
+    renderer.present = profiler.timed("present", renderer.present)
 
-# start the game with "main menu" state
-game_state = "main_menu"
+BACKGROUND_IMAGE = "background.png"
+bg_img = assets.get(BACKGROUND_IMAGE, (SCREEN_WIDTH, SCREEN_HEIGHT))
+
+# minigames are created when they are opened for the first time
+minigame_states = list(minigame_classes)
+minigames = {}
 
 # skin settings
-selected_skin = 0
+selected_skin = int(storage.get_setting("skin", 0))
 skin_settings = {0: "Default", 1: "Coat", 2: "Panda", 3: "Polo", 4: "Pumpkin", 5: "T-shirt"}
-skins = [default_img, coat_img, panda_img, polo_img, pumpkin_img, t_shirt_img]
+skins = skin_images_list
 
 # audio settings
-selected_audio = 1
+selected_audio = int(storage.get_setting("audio", 1))
 audio_settings = {1: "On", 0: "Off"}
+audio.set_enabled(selected_audio == 1)
+
+# with --record every minigame run that ends in a game over is saved as a replay
+recording = args.record
+game_input = InputRecorder(keyboard) if recording else keyboard
+
+# the current scene is on top of the stack, menus wait for input instead of redrawing every frame
+scenes = SceneManager()
+
+
+def get_minigame(state):
+    if state not in minigames:
+        minigames[state] = minigame_classes[state](renderer, random.Random(), game_input)
+        if args.precise_collision and hasattr(minigames[state], "precise_collision"):
+            minigames[state].precise_collision = True
+        if profiler is not None:
+            profiler.instrument(minigames[state], state)
+    return minigames[state]
+
+
+# every run gets a fresh seed so it can be recorded and replayed
+def begin_run(state):
+    seed = random.randrange(2 ** 32)
+    start_run(get_minigame(state), seed)
+    if recording:
+        game_input.start(state, seed)
+    return seed
+
+
+# a running minigame, p pauses it
+class MinigameScene(Scene):
+    def __init__(self, state):
+        self.state = state
+        self.game = get_minigame(state)
+        self.seed = None
+        self.ticks = 0
+
+    def enter(self):
+        keyboard.flush()
+        self.begin_run()
+
+    def begin_run(self):
+        self.seed = begin_run(self.state)
+        self.ticks = 0
+
+    def exit(self):
+        if recording:
+            game_input.cancel()
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_p and not self.game.is_game_over:
+            audio.pause_music()
+            scenes.push(pause_menu)
+
+    def update(self):
+        game_input.begin_tick()
+        was_game_over = self.game.is_game_over
+        result = self.game.update()
+        if not was_game_over:
+            self.ticks += 1
+
+        # escape goes back to the minigames menu
+        if result == "minigames":
+            scenes.pop()
+        elif self.game.is_game_over and not was_game_over:
+            storage.record_run(self.state, self.game.score, self.ticks, self.seed)
+            if recording:
+                print(f"Replay saved to {game_input.stop(self.game.score)}")
+        elif was_game_over and not self.game.is_game_over:
+            self.begin_run()
+
+    def render(self, alpha):
+        self.game.render(skins[selected_skin], alpha)
+
+
+def open_minigame(state):
+    scenes.push(MinigameScene(state))
+
+
+def resume_minigame():
+    keyboard.flush()
+    scenes.pop()
+    audio.resume_music()
+
 
-# create main menu buttons and buttons list
-minigames_button = Button(150, screen, "Minigames")
-settings_button = Button(250, screen, "Settings")
-exit_button = Button(350, screen, "Exit")
-main_menu_buttons = [minigames_button, settings_button, exit_button]
+# leave the paused minigame the same way escape does
+def quit_minigame():
+    scenes.pop()
+    scenes.top().game.set_starting_values()
+    audio.resume_music()
+    audio.stop_music()
+    scenes.pop()
 
-# create minigames buttons
-food_drop_button = Button(100, screen, "Food Drop")
-jet_pou_button = Button(200, screen, "Jet Pou")
-sky_hop_button = Button(300, screen, "Sky Hop")
-minigames_back_button = Button(400, screen, "Back")
-minigames_buttons = [food_drop_button, jet_pou_button, sky_hop_button, minigames_back_button]
+
+def toggle_skin():
+    global selected_skin
+    selected_skin = (selected_skin - 1) % len(skin_settings)
+    settings_skin.set_text(f"Skin: {skin_settings[selected_skin]}")
+    storage.set_setting("skin", selected_skin)
+    composites.set_skin(skins[selected_skin])
+
+
+def toggle_audio():
+    global selected_audio
+    selected_audio = (selected_audio + 1) % 2
+    audio.set_enabled(selected_audio == 1)
+    settings_audio.set_text(f"Audio: {audio_settings[selected_audio]}")
+    storage.set_setting("audio", selected_audio)
+
+
+def toggle_graphics():
+    global selected_graphics
+    selected_graphics = (selected_graphics + 1) % 2
+    renderer.set_canvas(*open_display(pygame.display.get_surface().get_size()))
+    settings_graphics.set_text(f"Graphics: {graphics_settings[selected_graphics]}")
+    storage.set_setting("graphics", selected_graphics)
+
+
+# start decoding the assets of the highlighted minigame in the background
+def preload_minigame(selected_index):
+    if selected_index < len(minigame_states):
+        game_class = minigame_classes[minigame_states[selected_index]]
+        assets.preload([*game_class.preload_assets, skins[selected_skin]])
+
+
+# create main menu buttons
+minigames_button = Button(150, renderer, "Minigames")
+settings_button = Button(250, renderer, "Settings")
+exit_button = Button(350, renderer, "Exit")
+main_menu = MenuScene(renderer, bg_img, [minigames_button, settings_button, exit_button],
+                      [lambda: scenes.push(minigames_menu), lambda: scenes.push(settings_menu), lambda: game_loop.stop()])
+
+# create minigames buttons, the highlighted minigame is preloaded
+food_drop_button = Button(100, renderer, "Food Drop")
+jet_pou_button = Button(200, renderer, "Jet Pou")
+sky_hop_button = Button(300, renderer, "Sky Hop")
+minigames_back_button = Button(400, renderer, "Back")
+minigames_menu = MenuScene(renderer, bg_img, [food_drop_button, jet_pou_button, sky_hop_button, minigames_back_button],
+                           [lambda: open_minigame("fooddrop"), lambda: open_minigame("jetpou"),
+                            lambda: open_minigame("skyhop"), scenes.pop], preload_minigame)
 
 # create settings menu buttons
-settings_skin = Button(150, screen, f"Skin: {skin_settings[selected_skin]}")
-settings_audio = Button(250, screen, f"Audio: {audio_settings[selected_audio]}")
-settings_back = Button(350, screen, "Back")
-settings_buttons = [settings_skin, settings_audio, settings_back]
-
-# menu state tracking
-main_menu_selected_index = 0
-settings_selected_index = 0
-minigames_selected_index = 0
-main_menu_buttons[main_menu_selected_index].set_selected(True)
-settings_buttons[settings_selected_index].set_selected(True)
-minigames_buttons[minigames_selected_index].set_selected(True)
-
-# dictionary of game states and functions
-game_actions = {
-    "main_menu": lambda: draw_buttons(main_menu_buttons),
-    "minigames": lambda: draw_buttons(minigames_buttons),
-    "settings": lambda: draw_buttons(settings_buttons),
-    "fooddrop": lambda: handle_game_result(FoodDrop.draw_game(skins[selected_skin], selected_audio)),
-    "jetpou": lambda: handle_game_result(JetPou.draw_game(skins[selected_skin], selected_audio)),
-    "skyhop": lambda: handle_game_result(SkyHop.draw_game(skins[selected_skin], selected_audio)),
-}
-
-
-# menu navigation
-def navigate_menu(buttons, selected_index, key):
-    buttons[selected_index].set_selected(False)
-    if key == pygame.K_w:
-        selected_index = (selected_index - 1) % len(buttons)
-    elif key == pygame.K_s:
-        selected_index = (selected_index + 1) % len(buttons)
-    buttons[selected_index].set_selected(True)
-    return selected_index
-
-
-# draw buttons for each menu
-def draw_buttons(buttons):
-    for button in buttons:
-        button.draw()
-
-
-# change game state after moving back from a minigame
-def handle_game_result(result):
-    global game_state
-    if result == "minigames":
-        game_state = "minigames"
-
-
-FoodDrop = FoodDropGame(screen)
-JetPou = JetPouGame(screen)
-SkyHop = SkyHopGame(screen)
-
-running = True
-while running:
-    # event handling
-    for event in pygame.event.get():
+settings_skin = Button(100, renderer, f"Skin: {skin_settings[selected_skin]}")
+settings_audio = Button(200, renderer, f"Audio: {audio_settings[selected_audio]}")
+settings_graphics = Button(300, renderer, f"Graphics: {graphics_settings[selected_graphics]}")
+settings_back = Button(400, renderer, "Back")
+settings_menu = MenuScene(renderer, bg_img, [settings_skin, settings_audio, settings_graphics, settings_back],
+                          [toggle_skin, toggle_audio, toggle_graphics, scenes.pop])
+
+# pause menu over a minigame
+pause_menu = OverlayMenuScene(renderer, [Button(200, renderer, "Resume"), Button(300, renderer, "Quit")],
+                              [resume_minigame, quit_minigame])
+
+
+# print how long it took to show the main menu
+def report_startup():
+    stats = assets.stats()
+    print(f"Main menu shown after {(time.perf_counter() - startup_time) * 1000:.0f} ms "
+          f"({stats['images']} images, {stats['sounds']} sounds loaded)")
+
+
+# load everything up front when lazy loading is off
+if not LAZY_LOADING:
+    assets.load_all(skins)
+    for minigame_class in minigame_classes.values():
+        assets.load_all(minigame_class.preload_assets)
+
+
+# event handling, the events are read once per frame and the keyboard keeps the key state for the minigames
+def handle_events():
+    for event in scenes.get_events():
+        keyboard.process_event(event)
         if event.type == pygame.QUIT:
-            running = False
-        # menu navigation
-        elif event.type == pygame.KEYDOWN:
-            if game_state == "main_menu":
-                # use the navigate_menu function for main menu
-                if event.key in (pygame.K_w, pygame.K_s):
-                    main_menu_selected_index = navigate_menu(main_menu_buttons, main_menu_selected_index, event.key)
-                elif event.key == pygame.K_SPACE:
-                    if main_menu_selected_index == 0:
-                        game_state = "minigames"
-                        minigames_selected_index = 0
-                        for button in minigames_buttons:
-                            button.set_selected(False)
-                        minigames_buttons[minigames_selected_index].set_selected(True)
-                    elif main_menu_selected_index == 1:
-                        game_state = "settings"
-                        settings_selected_index = 0
-                        for button in settings_buttons:
-                            button.set_selected(False)
-                        settings_buttons[settings_selected_index].set_selected(True)
-                    elif main_menu_selected_index == 2:
-                        running = False
-            elif game_state == "minigames":
-                if event.key in (pygame.K_w, pygame.K_s):
-                    minigames_selected_index = navigate_menu(minigames_buttons, minigames_selected_index, event.key)
-                elif event.key == pygame.K_SPACE:
-                    if minigames_selected_index == 0:
-                        game_state = "fooddrop"
-                    elif minigames_selected_index == 1:
-                        game_state = "jetpou"
-                    elif minigames_selected_index == 2:
-                        game_state = "skyhop"
-                    elif minigames_selected_index == len(minigames_buttons) - 1:
-                        game_state = "main_menu"
-            elif game_state == "settings":
-                # use the navigate_menu function for settings menu
-                if event.key in (pygame.K_w, pygame.K_s):
-                    settings_selected_index = navigate_menu(settings_buttons, settings_selected_index, event.key)
-                elif event.key == pygame.K_SPACE:
-                    if settings_selected_index == 0:
-                        selected_skin = (selected_skin - 1) % len(skin_settings)
-                        settings_skin = Button(150, screen, f"Skin: {skin_settings[selected_skin]}")
-                        settings_buttons = [settings_skin, settings_audio, settings_back]
-                        settings_selected_index = navigate_menu(settings_buttons, settings_selected_index, event.key)
-                    elif settings_selected_index == 1:
-                        selected_audio = (selected_audio + 1) % 2
-                        settings_audio = Button(250, screen, f"Audio: {audio_settings[selected_audio]}")
-                        settings_buttons = [settings_skin, settings_audio, settings_back]
-                        settings_selected_index = navigate_menu(settings_buttons, settings_selected_index, event.key)
-                    elif settings_selected_index == len(settings_buttons) - 1:
-                        game_state = "main_menu"
-                        main_menu_selected_index = 0
-                        for button in main_menu_buttons:
-                            button.set_selected(False)
-                        main_menu_buttons[main_menu_selected_index].set_selected(True)
-
-    screen.blit(bg_img, (0, 0))
-
-    # draw menu buttons
-    if game_state in game_actions:
-        game_actions[game_state]()
-
-    pygame.display.update()
+            game_loop.stop()
+        # toggle the profiler overlay
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and profiler is not None:
+            profiler.toggle_overlay()
+        # pygame.SCALED follows the window by itself, a plain window needs a new canvas size to scale to
+        elif event.type == pygame.VIDEORESIZE and not scaled_display:
+            renderer.set_canvas(*open_display(event.size))
+            scenes.redraw = True
+        else:
+            scenes.handle_event(event)
+
+    # polled every frame rather than every tick, idle menus run no ticks but still start the next track
+    audio.update()
+
+
+def update():
+    scenes.update()
+
+
+def render(alpha):
+    global startup_reported
+
+    # the profiler overlay keeps changing, so menus are redrawn while it is shown
+    if profiler is not None and profiler.show_overlay:
+        scenes.redraw = True
+
+    # draw the current scene, menus are skipped when nothing changed
+    if not scenes.render(alpha):
+        return
+
+    if profiler is not None:
+        profiler.draw_overlay(renderer)
+    renderer.present()
+
+    if not startup_reported:
+        startup_reported = True
+        if args.startup_report:
+            report_startup()
+
+
+startup_reported = False
+scenes.push(main_menu)
+game_loop = GameLoop(handle_events, update, render, profiler=profiler, is_idle=scenes.is_idle)
+game_loop.run()
+
+if args.profile_export:
+    profiler.export(args.profile_export)
+
+# wait for the queued writes before quitting
+storage.close()
 
 pygame.quit()
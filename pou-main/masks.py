@@ -0,0 +1,28 @@
+import pygame
+from assets import assets
+from skins_images import DEFAULT_IMAGE
+
+# every skin is a costume on the same body, so pou collides with the shape of the default skin
+POU_MASK_IMAGE = DEFAULT_IMAGE
+
+
+# collision masks of images at the size they are drawn, built once per image and size
+class MaskCache:
+    def __init__(self):
+        self.masks = {}
+
+    def get(self, name, size=None):
+        key = (name, size)
+        mask = self.masks.get(key)
+        if mask is None:
+            mask = self.masks[key] = pygame.mask.from_surface(assets.get(name, size))
+        return mask
+
+
+# pixel test of two masks drawn with their top left corners at the given positions, only worth calling once
+# their rects overlap
+def masks_overlap(mask, pos, other_mask, other_pos):
+    return mask.overlap(other_mask, (int(other_pos[0] - pos[0]), int(other_pos[1] - pos[1]))) is not None
+
+
+masks = MaskCache()
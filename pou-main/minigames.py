@@ -0,0 +1,11 @@
+from food_drop import FoodDropGame
+from jet_pou import JetPouGame
+from sky_hop import SkyHopGame
+
+minigame_classes = {"fooddrop": FoodDropGame, "jetpou": JetPouGame, "skyhop": SkyHopGame}
+
+
+# reseed the rng and reset a minigame, a run started this way can be repeated from the seed and its inputs
+def start_run(game, seed):
+    game.rng.seed(seed)
+    game.set_starting_values()
@@ -1,25 +1,20 @@
-from constants import MEDIUM_FONT, SCREEN_WIDTH, SMALL_FONT
+from constants import MEDIUM_FONT, SMALL_FONT
+from text_cache import text_cache
 
 
-def draw_game_over_menu(screen, score):
-    final_score_text = MEDIUM_FONT.render(f"Final score: {score}", True, "black")
-    screen.blit(final_score_text, (SCREEN_WIDTH / 2 - final_score_text.get_width() / 2, 150))
-    play_again_text = MEDIUM_FONT.render("Press Enter to play again", True, "black")
-    screen.blit(play_again_text, (SCREEN_WIDTH / 2 - play_again_text.get_width() / 2, 250))
-    move_back_text = MEDIUM_FONT.render("Press Escape to open main menu", True, "black")
-    screen.blit(move_back_text, (SCREEN_WIDTH / 2 - move_back_text.get_width() / 2, 350))
+# leaderboard is the list of best scores, highest first
+def draw_game_over_menu(screen, score, leaderboard=()):
+    center_x = screen.get_width() / 2
+    final_score_text = text_cache.render(MEDIUM_FONT, f"Final score: {score}", "black")
+    screen.blit(final_score_text, (center_x - final_score_text.get_width() / 2, 150))
+    play_again_text = text_cache.render(MEDIUM_FONT, "Press Enter to play again", "black")
+    screen.blit(play_again_text, (center_x - play_again_text.get_width() / 2, 250))
+    move_back_text = text_cache.render(MEDIUM_FONT, "Press Escape to open main menu", "black")
+    screen.blit(move_back_text, (center_x - move_back_text.get_width() / 2, 350))
+    if leaderboard:
+        best_text = text_cache.render(SMALL_FONT, "Best: " + "   ".join(str(best) for best in leaderboard), "black")
+        screen.blit(best_text, (center_x - best_text.get_width() / 2, 450))
 
 
 def draw_score(screen, score):
-    score_text = SMALL_FONT.render(f"Score: {score}", True, "black")
-    screen.blit(score_text, (50, 50))
-
-
-def play_sound(sound, audio_enabled):
-    if audio_enabled:
-        sound.play()
-
-
-def stop_sound(sound, audio_enabled):
-    if audio_enabled:
-        sound.stop()
\ No newline at end of file
+    text_cache.draw_number(screen, SMALL_FONT, "black", (50, 50), score, "Score: ")
@@ -0,0 +1,105 @@
+import math
+import pygame
+from assets import assets
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+
+# strips already tiled from an image, shared between layers and game restarts
+strips = {}
+
+
+# image repeated along one axis until it is a whole number of periods and at least as long as the screen,
+# so drawing it at any scroll position takes at most two blits
+def get_strip(name, period, vertical):
+    key = (name, period, vertical)
+    strip = strips.get(key)
+    if strip is None:
+        image = assets.get(name)
+        width, height = image.get_size()
+        length = height if vertical else width
+        viewport = SCREEN_HEIGHT if vertical else SCREEN_WIDTH
+        if length % period == 0 and length >= viewport:
+            strip = image
+        else:
+            # copy the first period of the image side by side
+            tile = image.subsurface((0, 0, width, period) if vertical else (0, 0, period, height))
+            count = math.ceil(viewport / period)
+            strip = pygame.Surface((width, period * count) if vertical else (period * count, height),
+                                   image.get_flags() & pygame.SRCALPHA, image)
+            for index in range(count):
+                strip.blit(tile, (0, period * index) if vertical else (period * index, 0))
+        strips[key] = strip
+    return strip
+
+
+# one depth layer, scrolls by speed pixels per second and by factor times any distance the game scrolls it,
+# the offset is kept as a float and wrapped by whole periods so the image repeats seamlessly
+class ParallaxLayer:
+    def __init__(self, image, speed=0, pos=(0, 0), vertical=False, period=None, factor=1):
+        self.image = image
+        self.speed = speed
+        self.pos = pos
+        self.vertical = vertical
+        self.period = period
+        self.factor = factor
+        self.offset = 0
+        self.prev_offset = 0
+
+    def get_period(self):
+        # the image size is only known once it is loaded
+        if self.period is None:
+            image = assets.get(self.image)
+            self.period = image.get_height() if self.vertical else image.get_width()
+        return self.period
+
+    def reset(self):
+        self.offset = 0
+        self.prev_offset = 0
+
+    def update(self, dt, distance=0):
+        self.prev_offset = self.offset
+        self.offset += self.speed * dt + distance * self.factor
+
+        # wrap both offsets by the same amount so interpolating between them still works
+        period = self.get_period()
+        if not 0 <= self.offset < period:
+            wrap = self.offset // period * period
+            self.offset -= wrap
+            self.prev_offset -= wrap
+
+    def draw(self, renderer, alpha=1, background=False):
+        period = self.get_period()
+        strip = get_strip(self.image, period, self.vertical)
+        length = strip.get_height() if self.vertical else strip.get_width()
+        viewport = SCREEN_HEIGHT if self.vertical else SCREEN_WIDTH
+
+        # position of the strip along the scrolling axis, a second copy fills the end of the screen if needed
+        position = -((self.prev_offset + (self.offset - self.prev_offset) * alpha) % period)
+        for shift in (0, length):
+            if shift and position + length >= viewport:
+                break
+            if self.vertical:
+                pos = (self.pos[0], self.pos[1] + position + shift)
+            else:
+                pos = (self.pos[0] + position + shift, self.pos[1])
+            if background and not shift:
+                renderer.set_background(strip, pos)
+            else:
+                renderer.blit(strip, pos)
+
+
+# layers drawn back to front, the first one becomes the renderer background
+class Parallax:
+    def __init__(self, layers):
+        self.layers = layers
+
+    def reset(self):
+        for layer in self.layers:
+            layer.reset()
+
+    def update(self, dt, distance=0):
+        for layer in self.layers:
+            layer.update(dt, distance)
+
+    def draw(self, renderer, alpha=1):
+        for index, layer in enumerate(self.layers):
+            layer.draw(renderer, alpha, index == 0)
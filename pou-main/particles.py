@@ -0,0 +1,197 @@
+import math
+import random
+from array import array
+import pygame
+from constants import PARTICLE_BUDGET, PARTICLE_FADE_STEPS
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# how an effect spawns its particles, speeds are in pixels per second and angles in degrees counterclockwise from
+# the right, velocity is added to every particle, each particle gets a random color and fades out over its life
+class Emitter:
+    def __init__(self, count, colors, radius=3, speed=(60, 120), angle=(0, 360), life=(0.3, 0.6), gravity=0,
+                 velocity=(0, 0)):
+        self.count = count
+        self.colors = colors
+        self.radius = radius
+        self.speed = speed
+        self.angle = angle
+        self.life = life
+        self.gravity = gravity
+        self.velocity = velocity
+
+
+# effects of the minigames
+emitters = {
+    # crumbs jumping off eaten food
+    "crumbs": Emitter(12, ((214, 160, 90), (245, 215, 140), (170, 110, 60)), radius=3, speed=(80, 220),
+                      angle=(20, 160), life=(0.3, 0.6), gravity=700),
+    # flames out of the jetpack, left behind as the world scrolls
+    "thrust": Emitter(3, ((255, 230, 90), (255, 150, 40), (230, 70, 30)), radius=4, speed=(100, 180),
+                      angle=(235, 265), life=(0.15, 0.35), velocity=(-120, 0)),
+    # dust kicked up by a landing
+    "dust": Emitter(10, ((240, 240, 240), (205, 205, 215)), radius=5, speed=(40, 120), angle=(-20, 200),
+                    life=(0.25, 0.5), gravity=-60),
+}
+
+
+# particles stored as columns in preallocated buffers, numpy arrays updated in whole batches when numpy is
+# installed and arrays otherwise, live particles are packed at the front so dead ones cost nothing, the budget
+# is a hard limit and particles past it are dropped, positions are top left corners of the particle sprites,
+# a disabled system ignores every emit so games that are never drawn pay nothing for their effects
+class ParticleSystem:
+    def __init__(self, budget=PARTICLE_BUDGET, fade_steps=PARTICLE_FADE_STEPS, rng=None, use_numpy=True, enabled=True):
+        self.enabled = enabled
+        self.budget = budget if enabled else 0
+        budget = self.budget
+        self.fade_steps = fade_steps
+
+        # separate from the game's rng so effects never change a run
+        self.rng = rng or random.Random()
+        self.vectorized = use_numpy and numpy is not None
+        if self.vectorized:
+            self.buffers = [numpy.zeros(budget, numpy.float32) for _ in range(7)] + [numpy.zeros(budget, numpy.int32)]
+        else:
+            self.buffers = [array("f", bytes(4 * budget)) for _ in range(7)] + [array("i", bytes(4 * budget))]
+        self.x, self.y, self.vx, self.vy, self.gravity, self.life, self.max_life, self.sprite = self.buffers
+        self.count = 0
+        self.dropped = 0
+        self.dt = 0
+
+        # draw positions and sprite indices, and the blits handed to the renderer, reused every frame
+        if self.vectorized:
+            self.draw_x, self.draw_y, self.draw_sprite = (numpy.zeros(budget, numpy.int32) for _ in range(3))
+            self.draw_fade = numpy.zeros(budget, numpy.float32)
+        self.batch = []
+
+        # every color and radius gets fade_steps sprites, faintest first, built on the first draw
+        self.sprite_keys = {}
+        self.sprites = []
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def sprite_index(self, color, radius):
+        key = (color, radius)
+        index = self.sprite_keys.get(key)
+        if index is None:
+            index = self.sprite_keys[key] = len(self.sprite_keys)
+        return index
+
+    def build_sprites(self):
+        for (color, radius), index in list(self.sprite_keys.items())[len(self.sprites) // self.fade_steps:]:
+            for step in range(self.fade_steps):
+                sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+                pygame.draw.circle(sprite, (*color, 255 * (step + 1) // self.fade_steps), (radius, radius), radius)
+                self.sprites.append(sprite)
+
+    # spawn the particles of a preset around x, y
+    def emit(self, name, x, y, count=None):
+        if not self.enabled:
+            return
+        emitter = emitters[name]
+        count = emitter.count if count is None else count
+        spawned = min(count, self.budget - self.count)
+        self.dropped += count - spawned
+        rng = self.rng
+        radius = emitter.radius
+        for index in range(self.count, self.count + spawned):
+            angle = math.radians(rng.uniform(*emitter.angle))
+            speed = rng.uniform(*emitter.speed)
+            self.x[index] = x - radius
+            self.y[index] = y - radius
+            self.vx[index] = math.cos(angle) * speed + emitter.velocity[0]
+            self.vy[index] = -math.sin(angle) * speed + emitter.velocity[1]
+            self.gravity[index] = emitter.gravity
+            self.life[index] = self.max_life[index] = rng.uniform(*emitter.life)
+            self.sprite[index] = self.sprite_index(rng.choice(emitter.colors), radius)
+        self.count += spawned
+
+    # move every particle dt seconds ahead and drop the ones that died
+    def update(self, dt):
+        self.dt = dt
+        if not self.count:
+            return
+        if self.vectorized:
+            self.update_batch(dt)
+        else:
+            self.update_each(dt)
+
+    def update_batch(self, dt):
+        count = self.count
+        life = self.life[:count]
+        life -= dt
+        vy = self.vy[:count]
+        vy += self.gravity[:count] * dt
+        self.x[:count] += self.vx[:count] * dt
+        self.y[:count] += vy * dt
+
+        alive = life > 0
+        kept = int(alive.sum())
+        if kept < count:
+            for buffer in self.buffers:
+                buffer[:kept] = buffer[:count][alive]
+            self.count = kept
+
+    def update_each(self, dt):
+        x, y, vx, vy, gravity, life, max_life, sprite = self.buffers
+        kept = 0
+        for index in range(self.count):
+            left = life[index] - dt
+            if left <= 0:
+                continue
+            speed = vy[index] + gravity[index] * dt
+            x[kept] = x[index] + vx[index] * dt
+            y[kept] = y[index] + speed * dt
+            vx[kept] = vx[index]
+            vy[kept] = speed
+            gravity[kept] = gravity[index]
+            life[kept] = left
+            max_life[kept] = max_life[index]
+            sprite[kept] = sprite[index]
+            kept += 1
+        self.count = kept
+
+    # all particles in one batch of blits, drawn between the previous and the current update
+    def draw(self, renderer, alpha=1):
+        count = self.count
+        if not count:
+            return
+        if len(self.sprites) < len(self.sprite_keys) * self.fade_steps:
+            self.build_sprites()
+        behind = (1 - alpha) * self.dt
+        steps = self.fade_steps
+        sprites = self.sprites
+        batch = self.batch
+        if len(batch) < count:
+            batch.extend([None] * (count - len(batch)))
+        if self.vectorized:
+            # positions are truncated like int() when cast into the int buffers
+            xs, ys, indices, fades = (self.draw_x[:count], self.draw_y[:count], self.draw_sprite[:count],
+                                      self.draw_fade[:count])
+            numpy.multiply(self.vx[:count], -behind, out=fades)
+            numpy.add(fades, self.x[:count], out=xs, casting="unsafe")
+            numpy.multiply(self.vy[:count], -behind, out=fades)
+            numpy.add(fades, self.y[:count], out=ys, casting="unsafe")
+            numpy.divide(self.life[:count], self.max_life[:count], out=fades)
+            fades *= steps
+            numpy.minimum(fades, steps - 1, out=fades)
+            numpy.multiply(self.sprite[:count], steps, out=indices)
+            numpy.add(indices, fades, out=indices, casting="unsafe")
+            for slot, (index, x, y) in enumerate(zip(indices.tolist(), xs.tolist(), ys.tolist())):
+                batch[slot] = (sprites[index], (x, y))
+        else:
+            x, y, vx, vy, life, max_life, sprite = (self.x, self.y, self.vx, self.vy, self.life, self.max_life,
+                                                    self.sprite)
+            for index in range(count):
+                batch[index] = (sprites[sprite[index] * steps + min(int(life[index] / max_life[index] * steps),
+                                                                    steps - 1)],
+                                (int(x[index] - vx[index] * behind), int(y[index] - vy[index] * behind)))
+        renderer.blits(batch, count)
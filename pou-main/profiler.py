@@ -0,0 +1,108 @@
+import csv
+import json
+import time
+from collections import deque
+import pygame
+from constants import PROFILER_HISTORY, PROFILER_OVERLAY_REFRESH, SMALL_FONT
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+# frame timing split into named sections, the last frames of every section are kept in ring buffers
+class Profiler:
+    def __init__(self, history=PROFILER_HISTORY):
+        self.history = history
+        self.frames = deque(maxlen=history)
+        self.sections = {}
+        self.current = {}
+        self.frame_start = None
+        self.show_overlay = False
+        self.overlay = None
+        self.overlay_time = 0
+
+    # wrap a function so its run time is added to a section of the current frame
+    def timed(self, name, function):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.current[name] = self.current.get(name, 0) + time.perf_counter() - start
+        return wrapper
+
+    # time the update and draw phases of a game object
+    def instrument(self, game, prefix):
+        for name in dir(game):
+            if name in ("update", "render") or name.startswith(("update_", "draw_")):
+                method = getattr(game, name)
+                if callable(method):
+                    setattr(game, name, self.timed(f"{prefix}.{name}", method))
+
+    # called once per rendered frame, closes the previous frame
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.frames.append(now - self.frame_start)
+            for name in self.sections.keys() | self.current.keys():
+                if name not in self.sections:
+                    self.sections[name] = deque([0] * (len(self.frames) - 1), maxlen=self.history)
+                self.sections[name].append(self.current.get(name, 0))
+        self.frame_start = now
+        self.current = {}
+
+    # p50, p95 and p99 in milliseconds
+    def summary(self):
+        result = {"frame": self.percentiles(self.frames)}
+        for name, samples in sorted(self.sections.items()):
+            result[name] = self.percentiles(samples)
+        return result
+
+    @staticmethod
+    def percentiles(samples):
+        ordered = sorted(samples)
+        return tuple(round(percentile(ordered, fraction) * 1000, 3) for fraction in (0.5, 0.95, 0.99))
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+
+    # the overlay text is rebuilt a few times per second so it stays readable and cheap
+    def draw_overlay(self, renderer):
+        if not self.show_overlay:
+            return
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_time > PROFILER_OVERLAY_REFRESH:
+            self.overlay_time = now
+            lines = [f"{name}: {p50:.2f} / {p95:.2f} / {p99:.2f} ms"
+                     for name, (p50, p95, p99) in self.summary().items()]
+            lines.insert(0, "p50 / p95 / p99")
+            rendered = [SMALL_FONT.render(line, True, "white") for line in lines]
+            width = max(line.get_width() for line in rendered) + 20
+            self.overlay = pygame.Surface((width, sum(line.get_height() for line in rendered) + 20),
+                                          pygame.SRCALPHA)
+            self.overlay.fill((0, 0, 0, 170))
+            y = 10
+            for line in rendered:
+                self.overlay.blit(line, (10, y))
+                y += line.get_height()
+        renderer.blit(self.overlay, (renderer.get_width() - self.overlay.get_width() - 10, 10))
+
+    # csv has one row per frame, json has the percentiles and the raw samples
+    def export(self, path):
+        names = sorted(self.sections)
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(["frame_ms", *[f"{name}_ms" for name in names]])
+                for index, frame in enumerate(self.frames):
+                    writer.writerow([round(frame * 1000, 3),
+                                     *[round(self.sections[name][index] * 1000, 3) for name in names]])
+        else:
+            with open(path, "w") as file:
+                json.dump({"percentiles_ms": self.summary(),
+                           "frames_ms": [round(frame * 1000, 3) for frame in self.frames],
+                           "sections_ms": {name: [round(sample * 1000, 3) for sample in self.sections[name]]
+                                           for name in names}}, file, indent=2)
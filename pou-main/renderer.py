@@ -0,0 +1,138 @@
+import pygame
+import weakref
+from collections import Counter
+from itertools import islice
+from constants import DIRTY_RECTS
+
+
+# collects everything drawn in a frame and presents it either as a full redraw or, in dirty rectangle mode,
+# by repainting and updating only the regions that changed since the previous frame, an offscreen surface
+# can be drawn to without updating the display
+class Renderer:
+    def __init__(self, screen, dirty_rects=DIRTY_RECTS, update_display=True, scale=1, output=None):
+        self.dirty_rects = dirty_rects
+        self.update_display = update_display
+
+        # background and draw calls of the current and the previous frame
+        self.background = None
+        self.items = []
+        self.set_canvas(screen, scale, output)
+
+    # everything is drawn in logical coordinates onto the canvas, which is scale times the logical size and is
+    # drawn with copies of the surfaces shrunk to the same scale, made once per surface, with an output the
+    # finished canvas is scaled onto it to fill the window
+    def set_canvas(self, screen, scale=1, output=None):
+        self.screen = screen
+        self.scale = scale
+        self.output = output
+        self.scaled = weakref.WeakKeyDictionary()
+        self.previous_background = None
+        self.previous_items = []
+
+    def get_width(self):
+        return round(self.screen.get_width() / self.scale)
+
+    def get_height(self):
+        return round(self.screen.get_height() / self.scale)
+
+    def get_rect(self):
+        return pygame.Rect(0, 0, self.get_width(), self.get_height())
+
+    # a surface at the scale of the canvas
+    def to_canvas(self, surface):
+        if self.scale == 1:
+            return surface
+        scaled = self.scaled.get(surface)
+        if scaled is None:
+            width, height = surface.get_size()
+            size = (max(round(width * self.scale), 1), max(round(height * self.scale), 1))
+            transform = pygame.transform.smoothscale if surface.get_bitsize() >= 24 else pygame.transform.scale
+            scaled = self.scaled[surface] = transform(surface, size)
+        return scaled
+
+    def set_background(self, surface, pos=(0, 0)):
+        self.background = (self.to_canvas(surface), (int(pos[0] * self.scale), int(pos[1] * self.scale)))
+
+    def blit(self, surface, pos):
+        surface = self.to_canvas(surface)
+        rect = pygame.Rect((int(pos[0] * self.scale), int(pos[1] * self.scale)), surface.get_size())
+        self.items.append((surface, rect))
+        return rect
+
+    # many surfaces at once, each with its own position, only the first count of the sequence when given
+    def blits(self, sequence, count=None):
+        scale = self.scale
+        append = self.items.append
+        if scale == 1:
+            for surface, pos in islice(sequence, count):
+                append((surface, pygame.Rect(pos, surface.get_size())))
+        else:
+            for surface, pos in islice(sequence, count):
+                surface = self.to_canvas(surface)
+                append((surface, pygame.Rect((int(pos[0] * scale), int(pos[1] * scale)), surface.get_size())))
+
+    def draw_rect(self, color, rect):
+        rect = pygame.Rect(rect)
+        if self.scale != 1:
+            rect = pygame.Rect(round(rect.x * self.scale), round(rect.y * self.scale), round(rect.width * self.scale),
+                               round(rect.height * self.scale))
+        self.items.append((color, rect))
+        return rect
+
+    def draw_items(self, items):
+        # runs of surfaces between rects are drawn with a single blits call
+        batch = []
+        for item, rect in items:
+            if isinstance(item, pygame.Surface):
+                batch.append((item, rect))
+            else:
+                if batch:
+                    self.screen.blits(batch, False)
+                    batch = []
+                pygame.draw.rect(self.screen, item, rect)
+        if batch:
+            self.screen.blits(batch, False)
+
+    def present(self):
+        if not self.dirty_rects or self.background is None or self.background != self.previous_background:
+            # repaint the whole screen
+            if self.background is not None:
+                self.screen.blit(*self.background)
+            self.draw_items(self.items)
+            dirty = None
+        else:
+            # regions where something appeared, disappeared or changed since the previous frame, counted as
+            # multisets since a translucent sprite drawn twice at the same place blends twice
+            current = Counter((item, tuple(rect)) for item, rect in self.items)
+            previous = Counter((item, tuple(rect)) for item, rect in self.previous_items)
+            dirty = [pygame.Rect(rect) for item, rect in (current - previous) + (previous - current)]
+            if dirty:
+                surface, pos = self.background
+                for region in dirty:
+                    # restore the background and redraw the items overlapping the region, clipped to it
+                    self.screen.set_clip(region)
+                    self.screen.blit(surface, pos)
+                    self.draw_items([item for item in self.items if item[1].colliderect(region)])
+                self.screen.set_clip(None)
+
+        if self.update_display and (dirty is None or dirty):
+            if self.output is not None:
+                self.present_scaled()
+                pygame.display.update()
+            else:
+                pygame.display.update(dirty)
+
+        self.previous_background = self.background
+        self.previous_items = self.items
+        self.items = []
+
+    # scale the canvas to fit the output, keeping its aspect ratio with black bars on the sides left over
+    def present_scaled(self):
+        width, height = self.output.get_size()
+        canvas_width, canvas_height = self.screen.get_size()
+        factor = min(width / canvas_width, height / canvas_height)
+        rect = pygame.Rect(0, 0, round(canvas_width * factor), round(canvas_height * factor))
+        rect.center = (width // 2, height // 2)
+        if rect.size != (width, height):
+            self.output.fill("black")
+        pygame.transform.scale(self.screen, rect.size, self.output.subsurface(rect))
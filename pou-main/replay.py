@@ -0,0 +1,238 @@
+import argparse
+import os
+import random
+import struct
+import time
+from array import array
+import pygame
+from audio import audio
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, UPDATE_RATE, REPLAY_DIRECTORY
+from game_loop import GameLoop
+from inputs import KeyState
+from minigames import minigame_classes, start_run
+from renderer import Renderer
+from skins_images import DEFAULT_IMAGE
+
+# keys stored in a replay, each one is a bit for held and a bit for pressed on that tick
+REPLAY_KEYS = (pygame.K_a, pygame.K_d, pygame.K_SPACE, pygame.K_RETURN, pygame.K_ESCAPE)
+REPLAY_MAGIC = b"POUR"
+REPLAY_VERSION = 1
+HEADER = struct.Struct("<4sBIHII")
+
+
+class Replay:
+    def __init__(self, game, seed, score=0, update_rate=UPDATE_RATE, ticks=None):
+        self.game = game
+        self.seed = seed
+        self.score = score
+        self.update_rate = update_rate
+        self.ticks = ticks if ticks is not None else array("H")
+
+
+def pack_keys(held, pressed):
+    mask = 0
+    for bit, key in enumerate(REPLAY_KEYS):
+        if key in held:
+            mask |= 1 << bit
+        if key in pressed:
+            mask |= 1 << (bit + len(REPLAY_KEYS))
+    return mask
+
+
+def unpack_keys(mask):
+    held = {key for bit, key in enumerate(REPLAY_KEYS) if mask & (1 << bit)}
+    pressed = [key for bit, key in enumerate(REPLAY_KEYS) if mask & (1 << (bit + len(REPLAY_KEYS)))]
+    return held, pressed
+
+
+def write_varint(output, value):
+    while value > 0x7F:
+        output.append(value & 0x7F | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def read_varint(data, position):
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+# the key masks are stored as runs, each run is the number of ticks and the bits that changed from the previous run
+def encode_replay(replay):
+    name = replay.game.encode()
+    output = bytearray(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, replay.seed, replay.update_rate, replay.score,
+                                   len(replay.ticks)))
+    output.append(len(name))
+    output += name
+
+    ticks = replay.ticks
+    previous, index = 0, 0
+    while index < len(ticks):
+        run = 1
+        while index + run < len(ticks) and ticks[index + run] == ticks[index]:
+            run += 1
+        write_varint(output, run)
+        write_varint(output, ticks[index] ^ previous)
+        previous = ticks[index]
+        index += run
+    return bytes(output)
+
+
+def decode_replay(data):
+    magic, version, seed, update_rate, score, tick_count = HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError("not a supported replay file")
+    position = HEADER.size
+    name = data[position + 1:position + 1 + data[position]].decode()
+    position += 1 + data[position]
+
+    ticks = array("H")
+    mask = 0
+    while len(ticks) < tick_count:
+        run, position = read_varint(data, position)
+        change, position = read_varint(data, position)
+        mask ^= change
+        ticks.extend([mask] * run)
+    return Replay(name, seed, score, update_rate, ticks)
+
+
+def save_replay(replay, directory=REPLAY_DIRECTORY):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{replay.game}-{time.strftime('%Y%m%d-%H%M%S')}-{replay.seed}.pou")
+    with open(path, "wb") as file:
+        file.write(encode_replay(replay))
+    return path
+
+
+def load_replay(path):
+    with open(path, "rb") as file:
+        return decode_replay(file.read())
+
+
+# wraps an input source, the key state is sampled once per tick and appended to the replay while recording
+class InputRecorder:
+    def __init__(self, source, directory=REPLAY_DIRECTORY):
+        self.source = source
+        self.directory = directory
+        self.replay = None
+        self.held = set()
+        self.previous = set()
+        self.pressed = []
+
+    def begin_tick(self):
+        self.source.begin_tick()
+        keys_pressed = self.source.get_pressed()
+        self.previous = self.held
+        self.held = {key for key in REPLAY_KEYS if keys_pressed[key]}
+        self.pressed = [key for key in self.source.get_keydowns() if key in REPLAY_KEYS]
+        if self.replay is not None:
+            self.replay.ticks.append(pack_keys(self.held, self.pressed))
+
+    def get_pressed(self):
+        return KeyState(self.held)
+
+    def get_keydowns(self):
+        return self.pressed
+
+    # released keys are not stored, they follow from the held keys
+    def get_keyups(self):
+        return list(self.previous - self.held)
+
+    def start(self, game, seed):
+        self.replay = Replay(game, seed)
+
+    # save the recorded run, returns the path of the file
+    def stop(self, score):
+        if self.replay is None:
+            return None
+        self.replay.score = score
+        path = save_replay(self.replay, self.directory)
+        self.replay = None
+        return path
+
+    def cancel(self):
+        self.replay = None
+
+
+# plays the recorded key state back tick by tick
+class ReplayInput:
+    def __init__(self, replay):
+        self.replay = replay
+        self.tick = -1
+        self.held = set()
+        self.previous = set()
+        self.pressed = []
+
+    def finished(self):
+        return self.tick + 1 >= len(self.replay.ticks)
+
+    def begin_tick(self):
+        self.tick += 1
+        self.previous = self.held
+        if self.tick < len(self.replay.ticks):
+            self.held, self.pressed = unpack_keys(self.replay.ticks[self.tick])
+        else:
+            self.held, self.pressed = set(), []
+
+    def get_pressed(self):
+        return KeyState(self.held)
+
+    def get_keydowns(self):
+        return self.pressed
+
+    # released keys are not stored, they follow from the held keys
+    def get_keyups(self):
+        return list(self.previous - self.held)
+
+
+# watch a replay in a window at the speed it was recorded
+def play_replay(replay):
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption(f"Pou replay: {replay.game}")
+    renderer = Renderer(screen)
+    replay_input = ReplayInput(replay)
+    game = minigame_classes[replay.game](renderer, random.Random(), replay_input)
+    start_run(game, replay.seed)
+
+    def handle_events():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                game_loop.stop()
+
+    def update():
+        if replay_input.finished():
+            game_loop.stop()
+            return
+        replay_input.begin_tick()
+        if game.update() == "minigames":
+            game_loop.stop()
+        audio.update()
+
+    def render(alpha):
+        game.render(DEFAULT_IMAGE, alpha)
+        renderer.present()
+
+    game_loop = GameLoop(handle_events, update, render, update_rate=replay.update_rate)
+    game_loop.run()
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a recorded minigame run")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    replay = load_replay(args.path)
+    game = play_replay(replay)
+    print(f"{replay.game}: score {game.score}, recorded {replay.score}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import pygame
+from constants import MENU_WAIT_TIMEOUT
+
+
+# a screen of the game, the scene manager calls these while the scene is on top of the stack
+class Scene:
+    # blocking scenes only change on input, so the loop waits for events and draws them only after input
+    blocking = False
+
+    # overlays are drawn on top of the scene below them
+    overlay = False
+
+    def enter(self):
+        pass
+
+    def exit(self):
+        pass
+
+    def handle_event(self, event):
+        pass
+
+    def update(self):
+        pass
+
+    def render(self, alpha):
+        pass
+
+
+# list of buttons navigated with w and s, space runs the action of the selected button
+class MenuScene(Scene):
+    blocking = True
+
+    def __init__(self, renderer, background, buttons, actions, on_highlight=None):
+        self.renderer = renderer
+        self.background = background
+        self.buttons = buttons
+        self.actions = actions
+        self.on_highlight = on_highlight
+        self.selected_index = 0
+
+    def enter(self):
+        self.select(0)
+
+    def select(self, index):
+        self.buttons[self.selected_index].set_selected(False)
+        self.selected_index = index
+        self.buttons[self.selected_index].set_selected(True)
+        if self.on_highlight is not None:
+            self.on_highlight(index)
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_w:
+                self.select((self.selected_index - 1) % len(self.buttons))
+            elif event.key == pygame.K_s:
+                self.select((self.selected_index + 1) % len(self.buttons))
+            elif event.key == pygame.K_SPACE:
+                self.actions[self.selected_index]()
+
+    def render(self, alpha):
+        if self.background is not None:
+            self.renderer.set_background(self.background)
+        for button in self.buttons:
+            button.draw()
+
+
+# menu drawn over the dimmed scene below it
+class OverlayMenuScene(MenuScene):
+    overlay = True
+
+    def __init__(self, renderer, buttons, actions):
+        super().__init__(renderer, None, buttons, actions)
+        self.shade = pygame.Surface(renderer.get_rect().size, pygame.SRCALPHA)
+        self.shade.fill((0, 0, 0, 120))
+
+    def render(self, alpha):
+        self.renderer.blit(self.shade, (0, 0))
+        super().render(alpha)
+
+
+# stack of scenes, the top scene gets the events and updates, drawing starts at the topmost scene that is not
+# an overlay
+class SceneManager:
+    def __init__(self, wait_timeout=MENU_WAIT_TIMEOUT):
+        self.stack = []
+        self.wait_timeout = wait_timeout
+        self.redraw = True
+
+    def top(self):
+        return self.stack[-1] if self.stack else None
+
+    def push(self, scene):
+        self.stack.append(scene)
+        scene.enter()
+        self.redraw = True
+
+    def pop(self):
+        self.stack.pop().exit()
+        self.redraw = True
+
+    # nothing changes until the next input
+    def is_idle(self):
+        top = self.top()
+        return top is not None and top.blocking and not self.redraw
+
+    # block until an event arrives when idle, the timeout wakes the loop so music waiting on a fade still starts
+    def get_events(self):
+        if self.is_idle():
+            event = pygame.event.wait(self.wait_timeout)
+            if event.type == pygame.NOEVENT:
+                return []
+            return [event] + pygame.event.get()
+        return pygame.event.get()
+
+    def handle_event(self, event):
+        top = self.top()
+        if top is not None:
+            if top.blocking:
+                self.redraw = True
+            top.handle_event(event)
+
+    def update(self):
+        top = self.top()
+        if top is not None:
+            top.update()
+
+    # returns False when there was nothing new to draw
+    def render(self, alpha):
+        if not self.stack or self.is_idle():
+            return False
+        start = len(self.stack) - 1
+        while start > 0 and self.stack[start].overlay:
+            start -= 1
+        for scene in self.stack[start:]:
+            scene.render(alpha)
+        self.redraw = False
+        return True
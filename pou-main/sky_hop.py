@@ -1,14 +1,32 @@
+import math
 import pygame
 import random
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT, GAME_OVER_SOUND, SKY_HOP_SOUND, JUMP_SOUND
-from minigames_functions import draw_score, draw_game_over_menu, play_sound, stop_sound
+from array import array
+from collections import deque
+from assets import assets
+from composites import composites, squash_scale, SKIN
+from inputs import keyboard
+from audio import audio
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, UPDATE_RATE, GAME_OVER_SOUND, SKY_HOP_SOUND, JUMP_SOUND
+from storage import storage
+from minigames_functions import draw_score, draw_game_over_menu
+from particles import ParticleSystem
+from parallax import Parallax, ParallaxLayer
+
+
+# default row generator, any step reachable from the step in the row below, row allows difficulty curves
+def random_step(rng, options, previous_step, row):
+    return rng.randint(*options[previous_step])
 
 
 class SkyHopGame:
-    sky_hop_background = pygame.image.load("sky_hop/skyhop_background.png")
-    step_image = pygame.image.load("sky_hop/sky_hop_step.png")
-    cloud_image = pygame.image.load("sky_hop/sky_hop_cloud.png")
+    name = "skyhop"
+    sky_hop_background = "sky_hop/skyhop_background.png"
+    step_image = "sky_hop/sky_hop_step.png"
+    cloud_image = "sky_hop/sky_hop_cloud.png"
+    preload_assets = [sky_hop_background, step_image, cloud_image, JUMP_SOUND, GAME_OVER_SOUND]
     pou_width, pou_height = 70, 70
+    pou_layers = ((SKIN, (pou_width, pou_height), (0, 0)),)
 
     # options for step position in a triple row
     four_step_row_options = {0: (0, 1), 1: (1, 2), 2: (2, 3)}
@@ -16,55 +34,49 @@ class SkyHopGame:
     # options for step position in a quadruple row
     three_step_row_options = {0: (0, 0), 1: (0, 1), 2: (1, 2), 3: (2, 2)}
 
-    def __init__(self, screen):
-        self.screen = screen
-        self.x = SCREEN_WIDTH / 2 - self.pou_width / 2
-        self.y = 440
-        self.score = 0
-        self.time_elapsed = 0
-        self.game_over = False
+    # rows alternate between three and four slots, starting with a three slot row under pou
+    three_step_row_x = (250, 550, 850)
+    four_step_row_x = (100, 400, 700, 1000)
+    step_width, step_height = 116, 36
+    first_row_y = 500
+    row_spacing = 150
+    start_step = 1
 
-        self.move_steps = False
-        self.steps_velocity = 17
+    # rows kept in the ring buffer, one more than fit on the screen so the next row scrolls in
+    row_count = 5
 
-        self.move_pou = False
-        self.pou_velocity = -10
-        self.direction = "R"
+    # the time bar shrinks by time_drain every tick, one more for every score_per_time_drain points
+    time_drain = 1
+    score_per_time_drain = 10
 
-        # initial steps indexes
-        self.triple_row_step_index = 1
-        self.quadruple_row_step_index = 1
-
-        # create list of four steps rows
-        self.four_steps_list = [
-            [{"rect": pygame.Rect(100, 350, 116, 36), "type": "cloud"},
-             {"rect": pygame.Rect(400, 350, 116, 36), "type": "cloud"},
-             {"rect": pygame.Rect(700, 350, 116, 36), "type": "step"},
-             {"rect": pygame.Rect(1000, 350, 116, 36), "type": "cloud"}],
-            [{"rect": pygame.Rect(100, 50, 116, 36), "type": "cloud"},
-             {"rect": pygame.Rect(400, 50, 116, 36), "type": "step"},
-             {"rect": pygame.Rect(700, 50, 116, 36), "type": "cloud"},
-             {"rect": pygame.Rect(1000, 50, 116, 36), "type": "cloud"}]
-
-        ]
-        # create list of three steps rows
-        self.three_steps_list = [
-            [{"rect": pygame.Rect(250, 500, 116, 36), "type": "cloud"},
-             {"rect": pygame.Rect(550, 500, 116, 36), "type": "step"},
-             {"rect": pygame.Rect(850, 500, 116, 36), "type": "cloud"}],
-            [{"rect": pygame.Rect(250, 200, 116, 36), "type": "cloud"},
-             {"rect": pygame.Rect(550, 200, 116, 36), "type": "step"},
-             {"rect": pygame.Rect(850, 200, 116, 36), "type": "cloud"}]
-        ]
-
-    def draw_game(self, skin, audio_enabled):
-        # draw background, skin, steps
-        if self.game_over:
-            self.screen.blit(self.sky_hop_background, (0, 0))
-            draw_game_over_menu(self.screen, self.score)
+    # hops that can be pressed ahead while pou is still in the air
+    jump_queue_size = 2
+
+    # pou squashes by up to landing_squash of its height for landing_ticks after landing on a step
+    landing_squash = 0.2
+    landing_ticks = 12
 
+    def __init__(self, screen, rng=None, input_source=None):
+        self.screen = screen
+        self.rng = rng or random.Random()
+        self.input = input_source or keyboard
+        self.pou_rect = pygame.Rect(0, 0, self.pou_width, self.pou_height)
+        self.step_rect = pygame.Rect(0, 0, self.step_width, self.step_height)
+
+        # the background scrolls down slower than the steps
+        self.background = Parallax([ParallaxLayer(self.sky_hop_background, vertical=True, factor=0.25)])
+
+        # step index of every row in the ring, row n is stored at n % row_count
+        self.row_steps = array("b", bytes(self.row_count))
+        self.step_generator = random_step
+        self.jump_queue = deque()
+        self.particles = ParticleSystem(enabled=screen is not None)
+        self.set_starting_values()
+
+    def update(self):
+        if self.is_game_over:
             # enter key to start again
-            keys_pressed = pygame.key.get_pressed()
+            keys_pressed = self.input.get_pressed()
             if keys_pressed[pygame.K_RETURN]:
                 self.set_starting_values()
 
@@ -73,39 +85,53 @@ class SkyHopGame:
                 self.set_starting_values()
                 return "minigames"
         else:
-            if not pygame.mixer.get_busy():
-                play_sound(SKY_HOP_SOUND, audio_enabled)
-            self.screen.blit(self.sky_hop_background, (0, 0))
-            skin = pygame.transform.scale(skin, (self.pou_width, self.pou_height))
-            self.draw_pou(skin, audio_enabled)
-            self.draw_steps(audio_enabled)
-            draw_score(self.screen, self.score)
-            self.draw_time_bar(audio_enabled)
+            audio.play_music(SKY_HOP_SOUND)
+            self.update_pou()
+            self.update_steps()
+            self.update_time_bar()
 
             # return to menu when escape key is pressed
-            keys_pressed = pygame.key.get_pressed()
+            keys_pressed = self.input.get_pressed()
             if keys_pressed[pygame.K_ESCAPE]:
                 self.set_starting_values()
-                stop_sound(SKY_HOP_SOUND, audio_enabled)
+                audio.stop_music()
                 return "minigames"
 
-    # draw pou function
-    def draw_pou(self, skin, audio_enabled):
-        self.screen.blit(skin, (self.x, self.y))
-
-        # if a or d key is pressed, make the steps and pou move
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_d and not self.move_pou:
-                    self.move_steps = True
-                    self.move_pou = True
-                    self.direction = "R"
-                    play_sound(JUMP_SOUND, audio_enabled)
-                elif event.key == pygame.K_a and not self.move_pou:
-                    self.move_steps = True
-                    self.move_pou = True
-                    self.direction = "L"
-                    play_sound(JUMP_SOUND, audio_enabled)
+    def render(self, skin, alpha):
+        # draw background, skin, steps
+        self.background.draw(self.screen, alpha)
+        if self.is_game_over:
+            draw_game_over_menu(self.screen, self.score, storage.top_scores(self.name))
+        else:
+            # pou and steps are drawn between the previous and the current tick
+            squash = self.landing_squash * math.sin(math.pi * max(self.landing - alpha, 0) / self.landing_ticks)
+            pou, offset = composites.frame(skin, self.pou_layers, scale=squash_scale(squash))
+            self.screen.blit(pou, (self.prev_x + (self.x - self.prev_x) * alpha + offset[0],
+                                   self.prev_y + (self.y - self.prev_y) * alpha + offset[1]))
+            self.draw_steps(self.steps_shift * (1 - alpha))
+            self.particles.draw(self.screen, alpha)
+            draw_score(self.screen, self.score)
+            self.draw_time_bar()
+
+    # update pou function
+    def update_pou(self):
+        self.prev_x, self.prev_y = self.x, self.y
+        if self.landing:
+            self.landing -= 1
+        self.particles.update(1 / UPDATE_RATE)
+
+        # queue a and d presses, so a hop pressed shortly before pou lands is not lost
+        for key in self.input.get_keydowns():
+            if key in (pygame.K_a, pygame.K_d) and len(self.jump_queue) < self.jump_queue_size:
+                self.jump_queue.append(key)
+
+        # make the steps and pou move
+        if self.jump_queue and not self.move_pou:
+            self.move_steps = True
+            self.move_pou = True
+            self.direction = "R" if self.jump_queue.popleft() == pygame.K_d else "L"
+            audio.play_sfx(JUMP_SOUND)
+
         # move pou
         if self.move_pou:
             self.y += self.pou_velocity
@@ -119,104 +145,75 @@ class SkyHopGame:
             if self.pou_velocity == 11:
                 self.move_pou = False
                 self.pou_velocity = -10
+                self.landing = self.landing_ticks
+                self.particles.emit("dust", self.x + self.pou_width / 2, self.y + self.pou_height)
                 # add score and time after reaching a step
                 self.score += 1
                 self.time_elapsed -= 100
 
         if self.x < -20 or self.x > SCREEN_WIDTH - 30:
-            self.game_over = True
-            play_sound(GAME_OVER_SOUND, audio_enabled)
-            stop_sound(SKY_HOP_SOUND, audio_enabled)
-
-    def draw_steps(self, audio_enabled):
-        for row in self.four_steps_list:
-            for step in row:
-                # check for collision with pou, game over if so
-                if step["rect"].colliderect(
-                        pygame.Rect(self.x, self.y, self.pou_width, self.pou_height)) and step["type"] == "cloud":
-                    self.game_over = True
-                    play_sound(GAME_OVER_SOUND, audio_enabled)
-                    stop_sound(SKY_HOP_SOUND, audio_enabled)
-
-                # blit four steps rows on the screen
-                if step["type"] == "step":
-                    self.screen.blit(self.step_image, (step["rect"].x, step["rect"].y))
-                else:
-                    self.screen.blit(self.cloud_image, (step["rect"].x, step["rect"].y))
-        # blit three steps rows on the screen
-        for row in self.three_steps_list:
-            for step in row:
-                # check for collision with pou, game over if so
-                if step["rect"].colliderect(
-                        pygame.Rect(self.x, self.y, self.pou_width, self.pou_height)) and step["type"] == "cloud":
-                    self.game_over = True
-                    play_sound(GAME_OVER_SOUND, audio_enabled)
-                    stop_sound(SKY_HOP_SOUND, audio_enabled)
-
-                # blit four steps rows on the screen
-                if step["type"] == "step":
-                    self.screen.blit(self.step_image, (step["rect"].x, step["rect"].y))
-                else:
-                    self.screen.blit(self.cloud_image, (step["rect"].x, step["rect"].y))
-
-        # add new four steps rows and delete those off the screen
-        if self.four_steps_list[0][0]["rect"].y > 600:
-            y_position = self.three_steps_list[-1][0]["rect"].y
-
-            # generate new step index based on previous step index in triple row
-            new_step_index = random.randint(*self.four_step_row_options[self.triple_row_step_index])
-
-            # add four new clouds in a row
-            self.four_steps_list.append([
-                {"rect": pygame.Rect(100, y_position - 150, 116, 36), "type": "cloud"},
-                {"rect": pygame.Rect(400,  y_position - 150, 116, 36), "type": "cloud"},
-                {"rect": pygame.Rect(700, y_position - 150, 116, 36), "type": "cloud"},
-                {"rect": pygame.Rect(1000, y_position - 150, 116, 36), "type": "cloud"}])
-
-            # change one of the clouds to step
-            self.four_steps_list[-1][new_step_index] = {
-                "rect": pygame.Rect(self.four_steps_list[-1][new_step_index]["rect"].x, y_position - 150, 116, 36),
-                "type": "step"}
-
-            # set the index for new step
-            self.quadruple_row_step_index = new_step_index
-
-            # remove the row that goes off the screen
-            self.four_steps_list.remove(self.four_steps_list[0])
-
-        # add new three steps rows and delete those off the screen
-        if self.three_steps_list[0][0]["rect"].y > 600:
-            y_position = self.four_steps_list[-1][0]["rect"].y
-
-            # generate new step index based on previous step index in quadruple row
-            new_step_index = random.randint(*self.three_step_row_options[self.quadruple_row_step_index])
-
-            # add three new clouds in a row
-            self.three_steps_list.append(
-                [{"rect": pygame.Rect(250, y_position - 150, 116, 36), "type": "cloud"},
-                 {"rect": pygame.Rect(550, y_position - 150, 116, 36), "type": "cloud"},
-                 {"rect": pygame.Rect(850, y_position - 150, 116, 36), "type": "cloud"}])
-
-            # change one of the clouds to step
-            self.three_steps_list[-1][new_step_index] = {
-                "rect": pygame.Rect(self.three_steps_list[-1][new_step_index]["rect"].x, y_position - 150, 116, 36),
-                "type": "step"}
-
-            # set the index for new step
-            self.triple_row_step_index = new_step_index
-
-            # remove the row that goes off the screen
-            self.three_steps_list.remove(self.three_steps_list[0])
-
-        # move the steps
+            self.is_game_over = True
+            audio.play_sfx(GAME_OVER_SOUND)
+            audio.stop_music()
+
+    def row_y(self, row):
+        return self.first_row_y - row * self.row_spacing + self.scroll
+
+    def row_x(self, row):
+        return self.four_step_row_x if row % 2 else self.three_step_row_x
+
+    def step_x(self, row):
+        return self.row_x(row)[self.row_steps[row % self.row_count]]
+
+    # pick the step of a new row from the options reachable from the step in the row below
+    def generate_row(self, row):
+        options = self.four_step_row_options if row % 2 else self.three_step_row_options
+        previous_step = self.row_steps[(row - 1) % self.row_count]
+        self.row_steps[row % self.row_count] = self.step_generator(self.rng, options, previous_step, row)
+
+    def draw_steps(self, offset):
+        # blit steps rows on the screen
+        step_image, cloud_image = assets.get(self.step_image), assets.get(self.cloud_image)
+        for row in range(self.first_row, self.first_row + self.row_count):
+            y = self.row_y(row) - offset
+            if y > SCREEN_HEIGHT or y + self.step_height < 0:
+                continue
+            step = self.row_steps[row % self.row_count]
+            for index, x in enumerate(self.row_x(row)):
+                self.screen.blit(step_image if index == step else cloud_image, (x, y))
+
+    # only the rows at pou's height are tested
+    def hits_cloud(self):
+        self.pou_rect.topleft = (self.x, self.y)
+        base = self.first_row_y + self.scroll - self.y
+        lowest = max(int((base - self.pou_height) // self.row_spacing), self.first_row)
+        highest = min(int((base + self.step_height) // self.row_spacing), self.first_row + self.row_count - 1)
+        for row in range(lowest, highest + 1):
+            step = self.row_steps[row % self.row_count]
+            for index, x in enumerate(self.row_x(row)):
+                self.step_rect.topleft = (x, self.row_y(row))
+                if index != step and self.pou_rect.colliderect(self.step_rect):
+                    return True
+        return False
+
+    def update_steps(self):
+        # game over if pou collides with a cloud
+        if self.hits_cloud():
+            self.is_game_over = True
+            audio.play_sfx(GAME_OVER_SOUND)
+            audio.stop_music()
+
+        # generate a new row on top in place of the row that goes off the screen
+        if self.row_y(self.first_row) > SCREEN_HEIGHT:
+            self.generate_row(self.first_row + self.row_count)
+            self.first_row += 1
+
+        # move the steps by scrolling all rows at once
+        self.steps_shift = 0
+        self.background.update(1 / UPDATE_RATE, -self.steps_velocity if self.move_steps else 0)
         if self.move_steps:
-            for row in self.three_steps_list:
-                for step in row:
-                    step["rect"].y += self.steps_velocity
-
-            for row in self.four_steps_list:
-                for step in row:
-                    step["rect"].y += self.steps_velocity
+            self.steps_shift = self.steps_velocity
+            self.scroll += self.steps_velocity
 
             # increase steps velocity and stop moving steps after reaching the cut-off value
             self.steps_velocity -= 1
@@ -224,12 +221,13 @@ class SkyHopGame:
                 self.move_steps = False
                 self.steps_velocity = 17
 
-    def draw_time_bar(self, audio_enabled):
-        pygame.draw.rect(self.screen, "gray", (0, SCREEN_HEIGHT - 40, SCREEN_WIDTH, 40))
-        pygame.draw.rect(self.screen, "green", (0, SCREEN_HEIGHT - 40, SCREEN_WIDTH - self.time_elapsed, 40))
+    def draw_time_bar(self):
+        self.screen.draw_rect("gray", (0, SCREEN_HEIGHT - 40, SCREEN_WIDTH, 40))
+        self.screen.draw_rect("green", (0, SCREEN_HEIGHT - 40, SCREEN_WIDTH - self.time_elapsed, 40))
 
+    def update_time_bar(self):
         # increase elapsed time
-        self.time_elapsed += 1 + self.score / 10
+        self.time_elapsed += self.time_drain + self.score / self.score_per_time_drain
 
         # time bar cannot be wider that screen
         if self.time_elapsed < 0:
@@ -237,46 +235,33 @@ class SkyHopGame:
 
         # game over if time bar ends
         if self.time_elapsed > SCREEN_WIDTH:
-            self.game_over = True
-            play_sound(GAME_OVER_SOUND, audio_enabled)
-            stop_sound(SKY_HOP_SOUND, audio_enabled)
+            self.is_game_over = True
+            audio.play_sfx(GAME_OVER_SOUND)
+            audio.stop_music()
 
     def set_starting_values(self):
+        self.background.reset()
         self.x = SCREEN_WIDTH / 2 - self.pou_width / 2
         self.y = 440
+        self.prev_x, self.prev_y = self.x, self.y
         self.score = 0
         self.time_elapsed = 0
-        self.game_over = False
+        self.is_game_over = False
+        self.landing = 0
+        self.particles.clear()
 
         self.move_steps = False
         self.steps_velocity = 17
+        self.steps_shift = 0
 
         self.move_pou = False
         self.pou_velocity = -10
         self.direction = "R"
-
-        # initial steps indexes
-        self.triple_row_step_index = 1
-        self.quadruple_row_step_index = 1
-
-        # create list of four steps rows
-        self.four_steps_list = [
-            [{"rect": pygame.Rect(100, 350, 116, 36), "type": "cloud"},
-             {"rect": pygame.Rect(400, 350, 116, 36), "type": "cloud"},
-             {"rect": pygame.Rect(700, 350, 116, 36), "type": "step"},
-             {"rect": pygame.Rect(1000, 350, 116, 36), "type": "cloud"}],
-            [{"rect": pygame.Rect(100, 50, 116, 36), "type": "cloud"},
-             {"rect": pygame.Rect(400, 50, 116, 36), "type": "step"},
-             {"rect": pygame.Rect(700, 50, 116, 36), "type": "cloud"},
-             {"rect": pygame.Rect(1000, 50, 116, 36), "type": "cloud"}]
-
-        ]
-        # create list of three steps rows
-        self.three_steps_list = [
-            [{"rect": pygame.Rect(250, 500, 116, 36), "type": "cloud"},
-             {"rect": pygame.Rect(550, 500, 116, 36), "type": "step"},
-             {"rect": pygame.Rect(850, 500, 116, 36), "type": "cloud"}],
-            [{"rect": pygame.Rect(250, 200, 116, 36), "type": "cloud"},
-             {"rect": pygame.Rect(550, 200, 116, 36), "type": "step"},
-             {"rect": pygame.Rect(850, 200, 116, 36), "type": "cloud"}]
-        ]
+        self.jump_queue.clear()
+
+        # the first row has its step under pou, the rows above are generated
+        self.scroll = 0
+        self.first_row = 0
+        self.row_steps[0] = self.start_step
+        for row in range(1, self.row_count):
+            self.generate_row(row)
@@ -0,0 +1,139 @@
+import queue
+import sqlite3
+import threading
+import time
+from constants import SAVE_DATABASE, LEADERBOARD_SIZE, WRITE_BATCH_SIZE, WRITE_FLUSH_INTERVAL
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    game TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    seed INTEGER,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_game_score ON runs (game, score DESC);
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+# scores, run statistics and settings in an sqlite database, the leaderboards and settings are read once when
+# the database is opened and kept in memory, writes are queued to a background thread that commits them in
+# batches so a game over never waits for the disk
+class Storage:
+    def __init__(self, leaderboard_size=LEADERBOARD_SIZE):
+        self.leaderboard_size = leaderboard_size
+        self.path = None
+        self.leaderboards = {}
+        self.settings = {}
+        self.writes = queue.Queue()
+        self.writer = None
+
+    def open(self, path=SAVE_DATABASE):
+        self.path = path
+        connection = sqlite3.connect(path)
+        with connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+        self.settings = dict(connection.execute("SELECT name, value FROM settings"))
+        self.leaderboards = {}
+        for game, score in connection.execute(
+                "SELECT game, score FROM (SELECT game, score, ROW_NUMBER() OVER "
+                "(PARTITION BY game ORDER BY score DESC) AS place FROM runs) WHERE place <= ? "
+                "ORDER BY game, score DESC", (self.leaderboard_size,)):
+            self.leaderboards.setdefault(game, []).append(score)
+        connection.close()
+
+        self.writer = threading.Thread(target=self.write_batches, daemon=True)
+        self.writer.start()
+
+    def is_open(self):
+        return self.writer is not None
+
+    # best scores of a game, highest first
+    def top_scores(self, game):
+        return self.leaderboards.get(game, [])
+
+    def record_run(self, game, score, ticks, seed=None):
+        leaderboard = self.leaderboards.setdefault(game, [])
+        leaderboard.append(score)
+        leaderboard.sort(reverse=True)
+        del leaderboard[self.leaderboard_size:]
+        self.write("INSERT INTO runs (game, score, ticks, seed, finished_at) VALUES (?, ?, ?, ?, ?)",
+                   (game, score, ticks, seed, time.time()))
+
+    def get_setting(self, name, default=None):
+        return self.settings.get(name, default)
+
+    def set_setting(self, name, value):
+        value = str(value)
+        if self.settings.get(name) != value:
+            self.settings[name] = value
+            self.write("INSERT OR REPLACE INTO settings (name, value) VALUES (?, ?)", (name, value))
+
+    def write(self, sql, parameters):
+        if self.is_open():
+            self.writes.put((sql, parameters))
+
+    # runs on the writer thread, waits for a write and commits everything queued within the flush interval
+    def write_batches(self):
+        connection = sqlite3.connect(self.path)
+        running = True
+        while running:
+            batch = [self.writes.get()]
+            deadline = time.perf_counter() + WRITE_FLUSH_INTERVAL
+            while batch[-1] is not None and len(batch) < WRITE_BATCH_SIZE:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.writes.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            # None stops the writer after the writes before it
+            if batch[-1] is None:
+                running = False
+            with connection:
+                for write in batch:
+                    if write is not None:
+                        connection.execute(*write)
+            for _ in batch:
+                self.writes.task_done()
+        connection.close()
+
+    # block until every queued write is committed
+    def flush(self):
+        if self.is_open():
+            self.writes.join()
+
+    def close(self):
+        if self.is_open():
+            self.writes.put(None)
+            self.writer.join()
+            self.writer = None
+
+    # aggregated from every run of a game, for reports outside of the game loop
+    def run_statistics(self, game):
+        self.flush()
+        connection = sqlite3.connect(self.path)
+        runs, best, average, ticks = connection.execute(
+            "SELECT COUNT(*), MAX(score), AVG(score), SUM(ticks) FROM runs WHERE game = ?", (game,)).fetchone()
+        connection.close()
+        return {"runs": runs, "best": best or 0, "average": average or 0, "ticks": ticks or 0}
+
+
+storage = Storage()
+
+
+if __name__ == "__main__":
+    storage.open()
+    for name in sorted(storage.leaderboards):
+        statistics = storage.run_statistics(name)
+        print(f"{name}: {statistics['runs']} runs, best {statistics['best']}, average {statistics['average']:.1f}, "
+              f"top scores {storage.top_scores(name)}")
+    storage.close()
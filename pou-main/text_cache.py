@@ -0,0 +1,67 @@
+from collections import OrderedDict
+from constants import TEXT_CACHE_SIZE
+
+DIGITS = "0123456789"
+
+
+# rendered text surfaces keyed on font, text, color and antialiasing, the least recently used ones are dropped,
+# numbers that change all the time are put together from a glyph atlas of the digits instead
+class TextCache:
+    def __init__(self, cache_size=TEXT_CACHE_SIZE):
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.digit_atlases = {}
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surface = self.cache.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.cache[key] = surface
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return surface
+
+    # all digits of a font rendered once into one surface, cut into a subsurface per digit at its advance
+    def digits(self, font, color, antialias=True):
+        key = (font, color, antialias)
+        glyphs = self.digit_atlases.get(key)
+        if glyphs is None:
+            atlas = font.render(DIGITS, antialias, color)
+            glyphs = self.digit_atlases[key] = {}
+            x = 0
+            for digit, metrics in zip(DIGITS, font.metrics(DIGITS)):
+                width = min(metrics[4], atlas.get_width() - x)
+                glyphs[digit] = atlas.subsurface((x, 0, width, atlas.get_height()))
+                x += width
+        return glyphs
+
+    # prefix, number and suffix drawn at pos, or ending at pos with right, the texts around the number come from
+    # the cache and the number is blitted digit by digit, so a new value never renders new text
+    def draw_number(self, screen, font, color, pos, number, prefix="", suffix="", right=False):
+        glyphs = self.digits(font, color)
+        parts = [glyphs[digit] for digit in str(number)]
+        if prefix:
+            parts.insert(0, self.render(font, prefix, color))
+        if suffix:
+            parts.append(self.render(font, suffix, color))
+        x, y = pos
+        if right:
+            x -= sum(part.get_width() for part in parts)
+        for part in parts:
+            screen.blit(part, (x, y))
+            x += part.get_width()
+
+    def stats(self):
+        return {"cached": len(self.cache), "hits": self.hits, "misses": self.misses,
+                "digit_atlases": len(self.digit_atlases)}
+
+
+text_cache = TextCache()
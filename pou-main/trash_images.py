@@ -1,9 +1,7 @@
-import pygame
-
-CD_IMAGE = pygame.image.load("food_drop/trash/cd.png")
-HORSESHOE = pygame.image.load("food_drop/trash/horseshoe.png")
-PLANE_IMAGE = pygame.image.load("food_drop/trash/plane.png")
-POOL_BALL_IMAGE = pygame.image.load("food_drop/trash/pool_ball.png")
-SHOE_IMAGE = pygame.image.load("food_drop/trash/shoe.png")
+CD_IMAGE = "food_drop/trash/cd.png"
+HORSESHOE = "food_drop/trash/horseshoe.png"
+PLANE_IMAGE = "food_drop/trash/plane.png"
+POOL_BALL_IMAGE = "food_drop/trash/pool_ball.png"
+SHOE_IMAGE = "food_drop/trash/shoe.png"
 
 trash_images_list = [CD_IMAGE, HORSESHOE, PLANE_IMAGE, POOL_BALL_IMAGE, SHOE_IMAGE]